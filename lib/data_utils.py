@@ -0,0 +1,83 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import streamlit as st
+
+# -----------------------------
+# Paths
+# -----------------------------
+DATA_DIR = os.path.expanduser("./data")
+STANCE_PATH = os.path.join(DATA_DIR, "stance_monthly.parquet")
+THEMES_PATH = os.path.join(DATA_DIR, "themes_monthly.parquet")
+MESO_PATH = os.path.join(DATA_DIR, "meso_monthly.parquet")
+
+# Columns the dashboards read; everything else stays on disk.
+STANCE_COLS = ["month", "model", "source_domain", "stance", "count"]
+THEMES_COLS = ["month", "model", "source_domain", "theme", "count"]
+MESO_COLS = ["month", "model", "source_domain", "meso_narrative", "count"]
+
+def data_version() -> tuple:
+    # Part of cache keys so that re-exported parquet files invalidate them
+    return tuple(os.path.getmtime(fp) if os.path.exists(fp) else None for fp in (STANCE_PATH, THEMES_PATH, MESO_PATH))
+
+# -----------------------------
+# Data Loading
+# -----------------------------
+def cast_count(table: pa.Table) -> pa.Table:
+    # One Arrow cast + null fill instead of to_numeric -> fillna -> astype; shared
+    # by every page loader so counts come out as int32 everywhere
+    if "count" in table.column_names:
+        table = table.set_column(table.schema.get_field_index("count"), "count", pc.fill_null(pc.cast(table["count"], pa.int32()), 0))
+    return table
+
+def parse_month(table: pa.Table) -> pa.Table:
+    # YYYY-MM strings -> timestamp of the month's first day (null if malformed),
+    # parsed on the Arrow table before any pandas conversion
+    if "month" in table.column_names:
+        month = pc.strptime(pc.binary_join_element_wise(table["month"], "-01", ""), format="%Y-%m-%d", unit="s", error_is_null=True)
+        table = table.set_column(table.schema.get_field_index("month"), "month", month)
+    return table
+
+def _read_parquet(fp, columns):
+    if not os.path.exists(fp):
+        return pd.DataFrame()
+    names = pq.read_schema(fp).names
+    table = parse_month(cast_count(pq.read_table(fp, columns=[c for c in columns if c in names])))
+    df = table.to_pandas()
+    # Normalize expected columns
+    if "source_domain" in df.columns:
+        df["source_domain"] = df["source_domain"].fillna("").astype(str)
+    if "model" in df.columns:
+        df["model"] = df["model"].fillna("").astype(str)
+    return df
+
+@st.cache_data(show_spinner=False)
+def parquet_models(fps: list[str], data_version: tuple) -> list[str]:
+    # Decodes every file's model column, so it runs once per file version
+    models = set()
+    for fp in fps:
+        if os.path.exists(fp):
+            col = pq.read_table(fp, columns=["model"]).column("model")
+            models.update(m for m in pc.unique(col).to_pylist() if m)
+    return sorted(models)
+
+@st.cache_resource(show_spinner=True, max_entries=1)
+def _load_parquets(data_version: tuple):
+    # One copy per server process (cache_resource does not copy on hit); callers
+    # must not mutate the returned frames in place.
+    return (
+        _read_parquet(STANCE_PATH, STANCE_COLS),
+        _read_parquet(THEMES_PATH, THEMES_COLS),
+        _read_parquet(MESO_PATH, MESO_COLS),
+    )
+
+def load_parquets():
+    # Full (all-model) stance/themes/meso frames, kept in session_state keyed by
+    # the files' mtimes so page switches reuse the same objects.
+    key = ("mignar_parquets",) + data_version()
+    if st.session_state.get("parquet_key") != key:
+        st.session_state["stance_df"], st.session_state["themes_df"], st.session_state["meso_df"] = _load_parquets(key[1:])
+        st.session_state["parquet_key"] = key
+    return st.session_state["stance_df"], st.session_state["themes_df"], st.session_state["meso_df"]
@@ -9,7 +9,7 @@ import streamlit as st
 # -----------------------------
 # Canonicalization
 # -----------------------------
-def _canon(s):
+def canon(s):
     if s is None or (isinstance(s, float) and pd.isna(s)):
         return ""
     s = unicodedata.normalize("NFKC", str(s)).replace("\u00A0", " ")
@@ -25,7 +25,8 @@ def load_data(csv_path: str = "data/GuardianCorpus_Vahid_AI_Annotated.csv"):
     if "date" in df.columns:
         df["date_dt"] = pd.to_datetime(df["date"], errors="coerce", utc=True)
     else:
-        df["date_dt"] = pd.NaT
+        # Same dtype as the parsed branch, so UTC bounds compare against it
+        df["date_dt"] = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns, UTC]")
 
     # Parse meso dict
     def _parse_mesos(val):
@@ -60,8 +61,8 @@ def explode_mesos(df: pd.DataFrame) -> pd.DataFrame:
     ex["meso narrative"] = ex["results"].apply(lambda r: (r or {}).get("meso narrative"))
     ex["text fragment"] = ex["results"].apply(lambda r: (r or {}).get("text fragment"))
 
-    ex["narrative frame"] = ex["narrative frame"].apply(_canon)
-    ex["meso narrative"] = ex["meso narrative"].apply(_canon)
+    ex["narrative frame"] = ex["narrative frame"].apply(canon)
+    ex["meso narrative"] = ex["meso narrative"].apply(canon)
     return ex.drop(columns=["results"])
 
 # -----------------------------
@@ -72,39 +73,25 @@ def aggregate_range(df_range: pd.DataFrame):
     total_articles = df_range["doc_id"].nunique()
 
     # Frame-level
-    f_articles = (
-        ex[ex["narrative frame"] != ""]
-        .groupby("narrative frame")["doc_id"].nunique()
-        .rename("articles").reset_index()
-    )
-    f_frag = (
-        ex[ex["narrative frame"] != ""]
-        .groupby("narrative frame")
-        .size().rename("fragments").reset_index()
+    f_grp = ex[ex["narrative frame"] != ""].groupby("narrative frame")["doc_id"]
+    frames_summary = (
+        pd.DataFrame({"articles": f_grp.nunique(), "fragments": f_grp.size()})
+        .fillna(0).rename_axis("narrative frame").reset_index()
     )
-    frames_summary = f_articles.merge(f_frag, on="narrative frame", how="outer").fillna(0)
     frames_summary["prevalence"] = frames_summary["articles"] / max(total_articles, 1)
-    frames_summary["intensity"] = frames_summary.apply(
-        lambda r: r["fragments"] / r["articles"] if r["articles"] > 0 else 0, axis=1
-    )
+    arts = frames_summary["articles"].to_numpy(dtype=float)
+    frames_summary["intensity"] = np.divide(frames_summary["fragments"].to_numpy(dtype=float), arts, out=np.zeros(arts.shape), where=arts > 0)
     frames_summary = frames_summary.sort_values(["articles", "fragments"], ascending=False).reset_index(drop=True)
 
     # Meso overall
-    m_articles = (
-        ex[ex["meso narrative"] != ""]
-        .groupby("meso narrative")["doc_id"].nunique()
-        .rename("articles").reset_index()
+    m_grp = ex[ex["meso narrative"] != ""].groupby("meso narrative")["doc_id"]
+    meso_summary = (
+        pd.DataFrame({"articles": m_grp.nunique(), "fragments": m_grp.size()})
+        .fillna(0).rename_axis("meso narrative").reset_index()
     )
-    m_frag = (
-        ex[ex["meso narrative"] != ""]
-        .groupby("meso narrative")
-        .size().rename("fragments").reset_index()
-    )
-    meso_summary = m_articles.merge(m_frag, on="meso narrative", how="outer").fillna(0)
     meso_summary["prevalence"] = meso_summary["articles"] / max(total_articles, 1)
-    meso_summary["intensity"] = meso_summary.apply(
-        lambda r: r["fragments"] / r["articles"] if r["articles"] > 0 else 0, axis=1
-    )
+    arts = meso_summary["articles"].to_numpy(dtype=float)
+    meso_summary["intensity"] = np.divide(meso_summary["fragments"].to_numpy(dtype=float), arts, out=np.zeros(arts.shape), where=arts > 0)
     meso_summary = meso_summary.sort_values(["articles", "fragments"], ascending=False).reset_index(drop=True)
 
     return {
@@ -122,8 +109,13 @@ def compute_frame_contrast(df_full: pd.DataFrame,
                            period_b: tuple,
                            min_articles_total: int = 3):
     (a_start, a_end), (b_start, b_end) = period_a, period_b
-    a_mask = (df_full["date_dt"].dt.date >= a_start) & (df_full["date_dt"].dt.date <= a_end)
-    b_mask = (df_full["date_dt"].dt.date >= b_start) & (df_full["date_dt"].dt.date <= b_end)
+    # date_dt is UTC; compare against half-open [start, end + 1 day) UTC Timestamps
+    def _in_range(start, end):
+        lo = pd.Timestamp(start, tz="UTC")
+        hi = pd.Timestamp(end, tz="UTC") + pd.Timedelta(days=1)
+        return (df_full["date_dt"] >= lo) & (df_full["date_dt"] < hi)
+    a_mask = _in_range(a_start, a_end)
+    b_mask = _in_range(b_start, b_end)
     df_a = df_full[a_mask].copy()
     df_b = df_full[b_mask].copy()
     agg_a = aggregate_range(df_a)
@@ -131,13 +123,12 @@ def compute_frame_contrast(df_full: pd.DataFrame,
     n_a = max(agg_a["total_articles"], 1)
     n_b = max(agg_b["total_articles"], 1)
 
-    fa = agg_a["frames_summary"][["narrative frame", "articles", "prevalence"]].rename(
-        columns={"articles": "articles_a", "prevalence": "prevalence_a"}
-    )
-    fb = agg_b["frames_summary"][["narrative frame", "articles", "prevalence"]].rename(
-        columns={"articles": "articles_b", "prevalence": "prevalence_b"}
-    )
-    merged = fa.merge(fb, on="narrative frame", how="outer").fillna(0)
+    fa = agg_a["frames_summary"].set_index("narrative frame")
+    fb = agg_b["frames_summary"].set_index("narrative frame")
+    merged = pd.DataFrame({
+        "articles_a": fa["articles"], "prevalence_a": fa["prevalence"],
+        "articles_b": fb["articles"], "prevalence_b": fb["prevalence"],
+    }).fillna(0).rename_axis("narrative frame").reset_index()
     merged["diff_prevalence"] = merged["prevalence_b"] - merged["prevalence_a"]
     merged["pooled_p"] = (merged["prevalence_a"] * n_a + merged["prevalence_b"] * n_b) / (n_a + n_b)
     denom = np.sqrt(merged["pooled_p"] * (1 - merged["pooled_p"]) * (1 / n_a + 1 / n_b)).replace(0, np.nan)
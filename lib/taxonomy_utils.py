@@ -0,0 +1,95 @@
+import os
+import re
+import sys
+import importlib.util
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
+import streamlit as st
+from lib.narratives_utils import canon
+
+TAXON_DIR = os.path.join(os.path.dirname(__file__), "../taxonomy")
+
+def normalize(text: str) -> str:
+    # NFKC + collapsed whitespace; applied to every taxonomy string on load so
+    # that queries normalized the same way meet them in one space
+    return canon(text)
+
+# -----------------------------
+# Revisions
+# -----------------------------
+def list_revisions() -> list[int]:
+    if not os.path.isdir(TAXON_DIR):
+        return []
+    revs = []
+    for fname in os.listdir(TAXON_DIR):
+        m = re.fullmatch(r"meso_narratives_revision_(\d+)\.py", fname)
+        if m:
+            revs.append(int(m.group(1)))
+    return sorted(set(revs))
+
+# -----------------------------
+# Loading
+# -----------------------------
+# Executing a revision module rebuilds every literal in it, so it runs once per
+# (file, mtime). The result is shared by all reruns and sessions and is returned
+# as a read-only mapping of theme -> tuple of narratives.
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _load_taxonomy(path: str, mtime: float) -> Mapping[str, tuple[str, ...]]:
+    spec = importlib.util.spec_from_file_location("meso_tax", path)
+    mod = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(mod)  # type: ignore
+    except Exception:
+        return MappingProxyType({})
+    data = getattr(mod, "mesoNarratives", None)
+    if not isinstance(data, Mapping):
+        for v in vars(mod).values():
+            if isinstance(v, Mapping):
+                data = v
+                break
+    if not isinstance(data, Mapping):
+        return MappingProxyType({})
+    # Strings are canonicalized once here, and narratives repeated under several
+    # themes (and across revisions) share one interned string.
+    out = {}
+    for k, v in data.items():
+        if isinstance(v, (list, tuple)):
+            out[sys.intern(normalize(k))] = tuple(sys.intern(normalize(x)) for x in v if isinstance(x, str))
+    return MappingProxyType(out)
+
+def _revision_file(revision: int) -> tuple[str, float] | None:
+    path = os.path.join(TAXON_DIR, f"meso_narratives_revision_{revision}.py")
+    if not os.path.exists(path):
+        return None
+    return path, os.path.getmtime(path)
+
+def load_taxonomy(revision: int) -> Mapping[str, tuple[str, ...]]:
+    key = _revision_file(revision)
+    return _load_taxonomy(*key) if key else MappingProxyType({})
+
+# -----------------------------
+# Lookups
+# -----------------------------
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _reverse_index(path: str, mtime: float) -> dict[str, tuple[str, ...]]:
+    index: dict[str, list[str]] = {}
+    for theme, narratives in _load_taxonomy(path, mtime).items():
+        for n in narratives:
+            index.setdefault(n, []).append(theme)
+    return {n: tuple(themes) for n, themes in index.items()}
+
+def reverse_index(revision: int) -> dict[str, tuple[str, ...]]:
+    # narrative -> themes it is listed under, built once per revision file version
+    key = _revision_file(revision)
+    return _reverse_index(*key) if key else {}
+
+# Repeat lookups skip the st.cache_resource argument hashing; the file version
+# is part of the key, so an edited revision file is never served stale.
+@lru_cache(maxsize=8192)
+def _categories_for(path: str, mtime: float, narrative: str) -> tuple[str, ...]:
+    return _reverse_index(path, mtime).get(normalize(narrative), ())
+
+def categories_for(revision: int, narrative: str) -> tuple[str, ...]:
+    key = _revision_file(revision)
+    return _categories_for(*key, narrative) if key else ()
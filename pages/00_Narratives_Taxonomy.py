@@ -1,7 +1,11 @@
-import os, re, importlib.util, urllib.parse, base64, json
+import os, urllib.parse, base64, json
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import streamlit as st
 from supabase import create_client, Client
+from lib.taxonomy_utils import list_revisions, load_taxonomy, normalize, reverse_index
 
 st.set_page_config(page_title="Meso Narratives Taxonomy",
                    layout="wide",
@@ -84,7 +88,6 @@ div[data-testid="column"] { padding-left: 0 !important; padding-right: 0 !import
 
 DATA_DIR   = os.path.expanduser("./data")
 MESO_PATH  = os.path.join(DATA_DIR, "meso_monthly.parquet")
-TAXON_DIR  = os.path.join(os.path.dirname(__file__), "../taxonomy")
 # NEW_MIN_COUNT = 20
 ARTICLES_SLUG = "Narratives_on_Articles"
 
@@ -97,54 +100,19 @@ ANNOT_TABLE = "taxonomy_annotations"
 def load_meso_df(fp: str) -> pd.DataFrame:
     if not os.path.exists(fp):
         return pd.DataFrame(columns=["month","model","version","source_domain","theme","meso_narrative","count"])
-    df = pd.read_parquet(fp)
+    table = pq.read_table(fp)
+    # Numeric columns: one Arrow cast + null fill each, before converting to pandas
+    for c, typ in (("count", pa.int32()), ("version", pa.int64())):
+        if c in table.column_names:
+            table = table.set_column(table.schema.get_field_index(c), c, pc.fill_null(pc.cast(table[c], typ), 0))
+    df = table.to_pandas()
     if "month" in df.columns:
         df["month"] = df["month"].astype(str)  # Keep as YYYY-MM string
     for c in ["source_domain","model","theme","meso_narrative"]:
         if c in df.columns:
             df[c] = df[c].fillna("").astype(str)
-    if "count" in df.columns:
-        df["count"] = pd.to_numeric(df["count"], errors="coerce").fillna(0).astype(int)
-    if "version" in df.columns:
-        df["version"] = pd.to_numeric(df["version"], errors="coerce").fillna(0).astype(int)
     return df
 
-# @st.cache_data(show_spinner=True, ttl="30m", max_entries=1)
-def list_revisions() -> list[int]:
-    if not os.path.isdir(TAXON_DIR):
-        return []
-    revs = []
-    for fname in os.listdir(TAXON_DIR):
-        m = re.fullmatch(r"meso_narratives_revision_(\d+)\.py", fname)
-        if m:
-            revs.append(int(m.group(1)))
-    return sorted(set(revs))
-
-# @st.cache_data(show_spinner=True, ttl="30m", max_entries=1)
-def load_taxonomy(revision: int) -> dict[str, list[str]]:
-    path = os.path.join(TAXON_DIR, f"meso_narratives_revision_{revision}.py")
-    if not os.path.exists(path):
-        return {}
-    spec = importlib.util.spec_from_file_location("meso_tax", path)
-    mod = importlib.util.module_from_spec(spec)
-    try:
-        spec.loader.exec_module(mod)  # type: ignore
-    except Exception:
-        return {}
-    data = getattr(mod, "mesoNarratives", None)
-    if not isinstance(data, dict):
-        for v in vars(mod).values():
-            if isinstance(v, dict):
-                data = v
-                break
-    if not isinstance(data, dict):
-        return {}
-    out = {}
-    for k, v in data.items():
-        if isinstance(v, (list, tuple)):
-            out[str(k)] = [str(x) for x in v if isinstance(x, str)]
-    return out
-
 # @st.cache_data(show_spinner=False, ttl="30m", max_entries=1)
 def fetch_user_annotations(user_id: str | None, revision: int) -> dict[tuple[str,str], str]:
     if not user_id:
@@ -231,16 +199,28 @@ if model_filter and "model" in filtered.columns:
     filtered = filtered[filtered.model == model_filter]
 
 agg = filtered.groupby(["theme","meso_narrative"], as_index=False)["count"].sum() if not filtered.empty else pd.DataFrame(columns=["theme","meso_narrative","count"])
-counts = {(r.theme, r.meso_narrative): int(r.count) for r in agg.itertuples()} if not agg.empty else {}
+# The taxonomy is normalized on load. Data and annotation strings stay raw, since
+# Articles links and stored annotations use them, and are normalized only to
+# compare: counts are keyed by the normalized pair, raw_keys maps it back.
+counts: dict[tuple[str, str], int] = {}
+raw_keys: dict[tuple[str, str], tuple[str, str]] = {}
+raw_themes: dict[str, str] = {}
+for r in agg.itertuples():
+    key = (normalize(r.theme), normalize(r.meso_narrative))
+    counts[key] = counts.get(key, 0) + int(r.count)
+    raw_keys.setdefault(key, (r.theme, r.meso_narrative))
+    raw_themes.setdefault(key[0], r.theme)
 
 taxonomy_themes = set(taxonomy.keys())
 theme_totals: dict[str, int] = {}
 for (th, mn), c in counts.items():
     theme_totals[th] = theme_totals.get(th, 0) + c
 
+# One dict lookup per (theme, narrative) instead of scanning the theme's list
+themes_of = reverse_index(chosen_rev)
 raw_new_narrs: dict[str, set[str]] = {}
 for (th, mn), c in counts.items():
-    if th not in taxonomy_themes or mn not in taxonomy.get(th, []):
+    if th not in themes_of.get(mn, ()):
         raw_new_narrs.setdefault(th, set()).add(mn)
 
 visible_themes = []
@@ -252,9 +232,10 @@ theme_narr_map: dict[str, tuple[list[str], list[str]]] = {}
 for th in visible_themes:
     base = list(taxonomy.get(th, []))
     extras = []
+    # raw_new_narrs already excludes the theme's taxonomy narratives (checked via
+    # the reverse index), so no list membership test against base is needed
     for mn in raw_new_narrs.get(th, set()):
-        c = counts.get((th, mn), 0)
-        if mn not in base and c >= NEW_MIN_COUNT:
+        if counts.get((th, mn), 0) >= NEW_MIN_COUNT:
             extras.append(mn)
     theme_narr_map[th] = (base, sorted(extras))
 
@@ -263,7 +244,10 @@ visible_themes_sorted = sorted(visible_themes, key=lambda t: theme_totals.get(t,
 st.title(f"Meso Narratives Taxonomy (Revision {chosen_rev})")
 st.caption("Review narratives, annotate quality, and explore articles. Your annotations are saved automatically.")
 st.info("📖 **New to annotation?** [Read the annotation guide](/Instructions#annotation-guide) to understand what each quality label means and how to use them effectively.")
-prefill_map = fetch_user_annotations(AUTH_UID if AUTH_UID else (USER.get("id") if USER else None), chosen_rev)
+prefill_map = {
+    (normalize(th), normalize(mn)): label
+    for (th, mn), label in fetch_user_annotations(AUTH_UID if AUTH_UID else (USER.get("id") if USER else None), chosen_rev).items()
+}
 
 def articles_link(theme: str | None = None, meso: str | None = None) -> str:
     params = []
@@ -290,7 +274,7 @@ for theme in visible_themes_sorted:
 
     header = st.columns([0.18, 0.52, 0.15, 0.15])
     with header[0]: 
-        link_button(theme, None, "View on Articles")
+        link_button(raw_themes.get(theme, theme), None, "View on Articles")
     with header[1]: 
         st.markdown("<small style='padding-left:10px;'><strong>Meso Narratives</strong></small>", unsafe_allow_html=True)
     with header[2]: 
@@ -303,12 +287,13 @@ for theme in visible_themes_sorted:
         is_new = (mn in extras) or new_theme or (mn not in base_list and not in_tax)
         row_bg = "#fafafa" if not is_new else "#fff8e1"
 
+        raw_theme, raw_mn = raw_keys.get((theme, mn), (theme, mn))
         pre = prefill_map.get((theme, mn))
         key_sel = f"annot::{chosen_rev}::{theme}::{mn}"
 
         row = st.columns([0.18, 0.52, 0.15, 0.15])
         with row[0]:
-            link_button(theme, mn, "View on Articles")
+            link_button(raw_theme, raw_mn, "View on Articles")
         with row[1]:
             new_tag = " <em style='color:#c77;'>(NEW)</em>" if is_new else ""
             st.markdown(f"<div class='narr-row' style='background:{row_bg};'><span class='narr-text'>{mn}{new_tag}</span></div>", unsafe_allow_html=True)
@@ -329,7 +314,7 @@ for theme in visible_themes_sorted:
                 )
                 # Save only if a real option chosen and changed
                 if choice in REAL_OPTIONS and choice != pre:
-                    if upsert_annotation(USER, chosen_rev, theme, mn, choice):
+                    if upsert_annotation(USER, chosen_rev, raw_theme, raw_mn, choice):
                         st.toast("✓ Saved")
                         prefill_map[(theme, mn)] = choice
                         # Clear cache to show updated data
@@ -190,20 +190,20 @@ def build_regex(nf: str):
     except re.error:
         return None
 
-def direct_search(body: str, frag: str):
+def direct_search(body: str, body_lower: str, frag: str):
     i = body.find(frag)
     if i >= 0:
         return (i, i + len(frag))
-    il = body.lower().find(frag.lower())
+    il = body_lower.find(frag.lower())
     if il >= 0:
         return (il, il + len(frag))
     return None
 
-def fuzzy_search(body: str, nf: str):
+def fuzzy_search(body: str, body_lower: str, nf: str):
     anchor = re.sub(r"^[^A-Za-z0-9]+", "", nf)[:8].lower()
     if not anchor:
         return None
-    positions = [m.start() for m in re.finditer(re.escape(anchor), body.lower())]
+    positions = [m.start() for m in re.finditer(re.escape(anchor), body_lower)]
     if not positions:
         return None
     target = re.sub(r"\s+", " ", nf.lower())
@@ -218,13 +218,9 @@ def fuzzy_search(body: str, nf: str):
         return (best[1], best[2])
     return None
 
-matches = []
-for obj in all_ann_frag_objs:
-    if not obj["has_fragment"]:
-        continue
-    frag = obj["fragment"]
+def locate_fragment(frag: str):
     nf = normalize_fragment(frag)
-    span = direct_search(body_text, frag) or direct_search(body_text, nf)
+    span = direct_search(body_text, body_lower, frag) or direct_search(body_text, body_lower, nf)
     if span is None:
         rgx = build_regex(nf)
         if rgx:
@@ -232,7 +228,21 @@ for obj in all_ann_frag_objs:
             if m:
                 span = m.span()
     if span is None:
-        span = fuzzy_search(body_text, nf)
+        span = fuzzy_search(body_text, body_lower, nf)
+    return span
+
+# The body is lowercased once and shared by every fragment search; models often
+# quote the same fragment, so each distinct fragment is searched once
+body_lower = body_text.lower()
+spans: dict[str, tuple[int, int] | None] = {}
+matches = []
+for obj in all_ann_frag_objs:
+    if not obj["has_fragment"]:
+        continue
+    frag = obj["fragment"]
+    if frag not in spans:
+        spans[frag] = locate_fragment(frag)
+    span = spans[frag]
     if span is None:
         continue
     s, e = span
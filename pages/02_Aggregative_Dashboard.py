@@ -1,43 +1,60 @@
-import os
 import streamlit as st
 import altair as alt
 import pandas as pd
+import numpy as np
+from lib.data_utils import DATA_DIR, data_version, load_parquets
 
 st.set_page_config(page_title="Aggregative Dashboard",
                    layout="wide",
                    page_icon=".streamlit/static/MigNar_icon.png")
 st.title("Aggregative Dashboard")
 
-# Use precomputed aggregates from ~/data
-DATA_DIR = os.path.expanduser("./data")
-STANCE_PATH = os.path.join(DATA_DIR, "stance_monthly.parquet")
-THEMES_PATH = os.path.join(DATA_DIR, "themes_monthly.parquet")
-MESO_PATH = os.path.join(DATA_DIR, "meso_monthly.parquet")
-
-# @st.cache_data(ttl="30m", show_spinner=True, max_entries=1)
-def load_parquets(stance_fp: str, themes_fp: str, meso_fp: str):
-    def _read_parquet(fp):
-        if not os.path.exists(fp):
-            return pd.DataFrame()
-        df = pd.read_parquet(fp)
-        # Normalize expected columns
-        if "month" in df.columns:
-            # Convert YYYY-MM string to datetime for filtering
-            df["month"] = pd.to_datetime(df["month"] + "-01", errors="coerce")
-        if "source_domain" in df.columns:
-            df["source_domain"] = df["source_domain"].fillna("").astype(str)
-        if "model" in df.columns:
-            df["model"] = df["model"].fillna("").astype(str)
-        if "count" in df.columns:
-            df["count"] = pd.to_numeric(df["count"], errors="coerce").fillna(0).astype(int)
-        return df
+# Use precomputed aggregates from ~/data, loaded once and shared across pages
+stance_df, themes_df, meso_df = load_parquets()
+
+# Part of every cache key below so that re-exported parquet files invalidate
+# the cubes and memoized chart aggregates.
+DATA_VERSION = data_version()
+
+# One set of cubes per server process; a new data version replaces the old set.
+@st.cache_resource(show_spinner=True, max_entries=1)
+def build_cubes(data_version: tuple, _stance_df: pd.DataFrame, _themes_df: pd.DataFrame, _meso_df: pd.DataFrame):
+    # Pre-aggregate each frame into a count Series indexed by a sorted
+    # (model, month, source_domain, label) MultiIndex. Chart queries then slice
+    # the index instead of masking and regrouping the full frames on every rerun.
+    # The *_totals cubes drop the month level and serve whole-range selections.
+    def _cube(df: pd.DataFrame, label: str, by_month: bool = True) -> pd.Series:
+        if df.empty or label not in df.columns:
+            return pd.Series(dtype="int64")
+        keys = ["model", "month", "source_domain", label] if by_month else ["model", "source_domain", label]
+        return df.groupby(keys)["count"].sum().sort_index()
 
-    stance_df = _read_parquet(stance_fp)
-    themes_df = _read_parquet(themes_fp)
-    meso_df = _read_parquet(meso_fp)
-    return stance_df, themes_df, meso_df
+    return {
+        "stance": _cube(_stance_df, "stance"),
+        "themes": _cube(_themes_df, "theme"),
+        "meso": _cube(_meso_df, "meso_narrative"),
+        "stance_totals": _cube(_stance_df, "stance", by_month=False),
+        "themes_totals": _cube(_themes_df, "theme", by_month=False),
+        "meso_totals": _cube(_meso_df, "meso_narrative", by_month=False),
+    }
 
-stance_df, themes_df, meso_df = load_parquets(STANCE_PATH, THEMES_PATH, MESO_PATH)
+def cube_get(cube: pd.Series, model, start_date, end_date, domains, group_by: list[str]) -> pd.Series:
+    if cube.empty:
+        return cube
+    sub = cube
+    if model:
+        if model not in sub.index.levels[0]:
+            return sub.iloc[:0]
+        sub = sub.xs(model, level="model")
+    if start_date and end_date:
+        sub = sub.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+    if sub.empty:
+        return sub
+    if domains:
+        sub = sub[sub.index.get_level_values("source_domain").isin(domains)]
+    return sub.groupby(level=group_by).sum()
+
+cubes = build_cubes(DATA_VERSION, stance_df, themes_df, meso_df)
 
 if stance_df.empty and themes_df.empty and meso_df.empty:
     st.error(f"No aggregates found in {DATA_DIR}. Make sure stance_monthly.parquet, themes_monthly.parquet, meso_monthly.parquet exist.")
@@ -45,32 +62,30 @@ if stance_df.empty and themes_df.empty and meso_df.empty:
 
 # Sidebar: model selector (single model for now, e.g., 'gpt-oss-20b')
 st.sidebar.header("Filters")
-available_models = sorted(set(
-    list(stance_df.get("model", pd.Series(dtype=str)).unique() if "model" in stance_df else []) +
-    list(themes_df.get("model", pd.Series(dtype=str)).unique() if "model" in themes_df else []) +
-    list(meso_df.get("model", pd.Series(dtype=str)).unique() if "model" in meso_df else [])
-))
+# Models are the first level of the cube indexes (built from exactly the observed values)
+available_models = sorted(set().union(*(cubes[k].index.levels[0] for k in ("stance", "themes", "meso") if not cubes[k].empty)))
 default_model = "gpt-oss-20b" if "gpt-oss-20b" in available_models else (available_models[0] if available_models else None)
 selected_model = st.sidebar.selectbox("Model", options=available_models, index=available_models.index(default_model) if default_model in available_models else 0)
 
-def by_model(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty or "model" not in df.columns or not selected_model:
-        return df
-    return df[df["model"] == selected_model].copy()
-
-stance_df = by_model(stance_df)
-themes_df = by_model(themes_df)
-meso_df = by_model(meso_df)
-
-# Date range bounds from filtered-by-model data
-date_cols = []
-for df in (stance_df, themes_df, meso_df):
-    if not df.empty and "month" in df.columns:
-        date_cols.append(pd.Series(df["month"]))
-if date_cols:
-    all_months = pd.concat(date_cols, ignore_index=True).dropna()
-    min_dt = all_months.min().date()
-    max_dt = all_months.max().date()
+# Date range bounds for the selected model, read off the cube indexes
+def cube_month_bounds(cube: pd.Series, model):
+    if cube.empty:
+        return None
+    idx = cube.index
+    if not model:
+        months = idx.get_level_values("month")
+        return months.min(), months.max()
+    if model not in idx.levels[0]:
+        return None
+    # The index is sorted by (model, month, ...), so the model's first and last
+    # months sit at the two ends of its slice.
+    loc = idx.get_loc(model)
+    return idx.levels[1][idx.codes[1][loc.start]], idx.levels[1][idx.codes[1][loc.stop - 1]]
+
+month_bounds = [b for b in (cube_month_bounds(cubes[k], selected_model) for k in ("stance", "themes", "meso")) if b]
+if month_bounds:
+    min_dt = min(lo for lo, _ in month_bounds).date()
+    max_dt = max(hi for _, hi in month_bounds).date()
 else:
     min_dt = max_dt = None
 
@@ -89,22 +104,27 @@ else:
     st.info("No valid day column detected; using full dataset.")
     start_date = end_date = None
 
-def filter_by_date(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty or "month" not in df.columns or not start_date or not end_date:
-        return df
-    # Convert date picker values to month start for comparison
-    return df[(df["month"].dt.date >= start_date) & (df["month"].dt.date <= end_date)].copy()
-
-stance_f = filter_by_date(stance_df)
-themes_f = filter_by_date(themes_df)
-meso_f = filter_by_date(meso_df)
-
-# Domains available after model + date filters
-domains = set()
-for df in (stance_f, themes_f, meso_f):
-    if not df.empty and "source_domain" in df.columns:
-        domains.update(df["source_domain"].dropna().unique().tolist())
-domains = sorted([d for d in domains if d])
+# A range covering every month of the selected model can be answered from the
+# month-free totals cubes; narrower ranges sum the monthly cubes.
+full_range = not (start_date and end_date) or (start_date <= min_dt and end_date >= max_dt)
+
+# Memoized per filter combination; st.cache_data is shared by every session of
+# the server process, so users landing on the default filters reuse one result.
+@st.cache_data(ttl="1h", show_spinner=False)
+def query_cube(data_version: tuple, kind: str, model, start_date, end_date, domains: tuple, group_by: tuple, full_range: bool, _cubes: dict) -> pd.DataFrame:
+    if full_range:
+        sums = cube_get(_cubes[f"{kind}_totals"], model, None, None, list(domains), list(group_by))
+    else:
+        sums = cube_get(_cubes[kind], model, start_date, end_date, list(domains), list(group_by))
+    return sums.rename("articles").reset_index()
+
+# Domains available after model + date filters, read off the cubes (nulls are
+# filled with "" on load)
+domain_sets = [
+    query_cube(DATA_VERSION, kind, selected_model, start_date, end_date, (), ("source_domain",), full_range, cubes)["source_domain"]
+    for kind in ("stance", "themes", "meso") if not cubes[kind].empty
+]
+domains = [d for d in sorted(set().union(*domain_sets)) if d]
 default_domains = ['UK Parliament (Con)','UK Parliament (Lab)','US Congress (Rep)','US Congress (Dem)', 'dailymail.co.uk','telegraph.co.uk', 'theguardian.com','bbc.co.uk','independent.co.uk','thesun.co.uk','mirror.co.uk']
 default_domains = [d for d in default_domains if d in domains]
 
@@ -114,53 +134,60 @@ selected_domains = st.sidebar.multiselect(
     default=default_domains
 )
 
-def filter_by_domain(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty or not selected_domains:
-        return df
-    return df[df["source_domain"].isin(selected_domains)].copy()
-
 st.sidebar.markdown("---")
 # if st.sidebar.button("🧹 Clear Cache (if slow)"):
 #     st.cache_data.clear()
 #     st.success("Cache cleared! Refresh to reload data.")
 
-stance_f = filter_by_domain(stance_f)
-themes_f = filter_by_domain(themes_f)
-meso_f = filter_by_domain(meso_f)
+def aggregate(kind: str, group_by: tuple) -> pd.DataFrame:
+    return query_cube(DATA_VERSION, kind, selected_model, start_date, end_date, tuple(sorted(selected_domains)), group_by, full_range, cubes)
 
 # Macros (from 03_Contrastive_Dashboard) + apply here
 st.sidebar.subheader("Macros")
 min_support = st.sidebar.slider("Min articles per label", 0, 10000, 100, 1)
 top_n = st.sidebar.slider("Top N items", 5, 40, 25, 1)
 
+# Aggregates are monthly: a range without any month start cannot match a row,
+# so skip all chart work up front.
+if start_date and end_date and pd.date_range(start_date, end_date, freq="MS").empty:
+    st.info("The selected date range does not include the start of any month; widen it to see aggregates.")
+    st.stop()
+
 # 1) Stance bubble chart (aggregate per domain across selected range)
 st.subheader("Aggregate Stance Toward Migration (by Source Domain)")
-if stance_f.empty:
+stance_sum = aggregate("stance", ("source_domain", "stance"))
+if stance_sum.empty:
     st.info("No stance data available for the selected filters.")
 else:
-    stance_sum = (
-        stance_f.groupby(["source_domain", "stance"], as_index=False)["count"]
+    # Pivot (OPEN/RESTRICTIVE/NEUTRAL) and totals
+    pivot = (
+        stance_sum.groupby(["source_domain", "stance"], observed=True)["articles"]
         .sum()
-        .rename(columns={"count": "articles"})
+        .unstack("stance", fill_value=0)
+        .reindex(columns=["OPEN", "RESTRICTIVE", "NEUTRAL"], fill_value=0)
+        .reset_index()
     )
-    # Pivot (OPEN/RESTRICTIVE/NEUTRAL) and totals
-    pivot = stance_sum.pivot_table(
-        index="source_domain",
-        columns="stance",
-        values="articles",
-        aggfunc="sum",
-        fill_value=0
-    ).reset_index()
-    for col in ["OPEN", "RESTRICTIVE", "NEUTRAL"]:
-        if col not in pivot.columns:
-            pivot[col] = 0
     pivot["total"] = pivot["OPEN"] + pivot["RESTRICTIVE"] + pivot["NEUTRAL"]
     # Apply min_support on domain totals (optional for robustness)
     if min_support > 0:
         pivot = pivot[pivot["total"] >= int(min_support)].copy()
 
-    pivot["stance_score"] = (pivot["OPEN"] - pivot["RESTRICTIVE"]) / pivot["total"].replace({0: pd.NA})
+    total = pivot["total"].to_numpy()
+    score = np.full(total.shape, np.nan)
+    np.divide((pivot["OPEN"] - pivot["RESTRICTIVE"]).to_numpy(), total, out=score, where=total > 0)
+    pivot["stance_score"] = score
     stance_chart_df = pivot.dropna(subset=["stance_score"]).copy()
+    # One preformatted tooltip string per bubble keeps the embedded chart data
+    # down to the columns the encodings actually use.
+    stance_chart_df["tip"] = (
+        "Domain: " + stance_chart_df["source_domain"]
+        + " | Score: " + stance_chart_df["stance_score"].astype(float).map("{:.2f}".format)
+        + " | OPEN: " + stance_chart_df["OPEN"].astype(str)
+        + " | RESTRICTIVE: " + stance_chart_df["RESTRICTIVE"].astype(str)
+        + " | NEUTRAL: " + stance_chart_df["NEUTRAL"].astype(str)
+        + " | Total: " + stance_chart_df["total"].astype(str)
+    )
+    stance_chart_df = stance_chart_df[["source_domain", "stance_score", "total", "tip"]]
 
     st.caption("Score = (OPEN - RESTRICTIVE) / (OPEN + RESTRICTIVE + NEUTRAL). Bubble size = total articles.")
     # Bubble chart: x = stance score (-1..1), y = domain, size = total, color ~ stance score
@@ -171,28 +198,17 @@ else:
         y=alt.Y("source_domain:N", sort="-x", title="Source Domain", axis=alt.Axis(labelLimit=0, labelOverlap=False)),
         size=alt.Size("total:Q", title="Total Articles", scale=alt.Scale(range=[30, 1200])),
         color=alt.Color("stance_score:Q", title="Stance", scale=color_scale),
-        tooltip=[
-            alt.Tooltip("source_domain:N", title="Domain"),
-            alt.Tooltip("stance_score:Q", title="Score", format=".2f"),
-            alt.Tooltip("OPEN:Q", title="OPEN"),
-            alt.Tooltip("RESTRICTIVE:Q", title="RESTRICTIVE"),
-            alt.Tooltip("NEUTRAL:Q", title="NEUTRAL"),
-            alt.Tooltip("total:Q", title="Total"),
-        ],
+        tooltip=alt.Tooltip("tip:N"),
     ).properties(height=h, title=f"Aggregate Stance by Domain (Model: {selected_model})")
     st.altair_chart(chart, width="stretch")
 
 
 # 2) Themes bar chart (top themes by total articles)
 st.subheader("Top Narrative Themes (selected range)")
-if themes_f.empty:
+themes_sum = aggregate("themes", ("theme",))
+if themes_sum.empty:
     st.info("No theme data available for the selected filters.")
 else:
-    themes_sum = (
-        themes_f.groupby("theme", as_index=False)["count"]
-        .sum()
-        .rename(columns={"count": "articles"})
-    )
     if min_support > 0:
         themes_sum = themes_sum[themes_sum["articles"] >= int(min_support)]
     themes_top = themes_sum.sort_values("articles", ascending=False).head(int(top_n))
@@ -207,14 +223,10 @@ else:
 
 # 3) Meso narratives bar chart (top meso narratives)
 st.subheader("Top Meso Narratives (selected range)")
-if meso_f.empty:
+meso_sum = aggregate("meso", ("meso_narrative",))
+if meso_sum.empty:
     st.info("No meso narrative data available for the selected filters.")
 else:
-    meso_sum = (
-        meso_f.groupby("meso_narrative", as_index=False)["count"]
-        .sum()
-        .rename(columns={"count": "articles"})
-    )
     if min_support > 0:
         meso_sum = meso_sum[meso_sum["articles"] >= int(min_support)]
     meso_top = meso_sum.sort_values("articles", ascending=False).head(int(top_n))
@@ -226,8 +238,26 @@ else:
     ).properties(title=f"Top Meso Narratives (Model: {selected_model})", height=h)
     st.altair_chart(meso_chart, width="stretch")
 
+def filter_rows(df: pd.DataFrame) -> pd.DataFrame:
+    # Model, date and domain filters as one mask over the full frame
+    if df.empty:
+        return df
+    m = np.ones(len(df), dtype=bool)
+    if selected_model and "model" in df.columns:
+        m &= (df["model"] == selected_model).to_numpy()
+    if start_date and end_date and "month" in df.columns:
+        # Compare datetime64 months against half-open [start, end + 1 day) Timestamps
+        start_ts, end_ts = pd.Timestamp(start_date), pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        m &= ((df["month"] >= start_ts) & (df["month"] < end_ts)).to_numpy()
+    if selected_domains and "source_domain" in df.columns:
+        m &= df["source_domain"].isin(selected_domains).to_numpy()
+    return df.loc[m]
+
+# Expander bodies run on every rerun, so the full-frame masks only run once
+# the rows are asked for.
 with st.expander("Raw aggregates"):
     st.write("Model:", selected_model)
-    st.write("Stance (filtered):", stance_f.head(100))
-    st.write("Themes (filtered):", themes_f.head(100))
-    st.write("Meso (filtered):", meso_f.head(100))
\ No newline at end of file
+    if st.checkbox("Show filtered rows", key="show_raw_aggregates"):
+        st.write("Stance (filtered):", filter_rows(stance_df).head(100))
+        st.write("Themes (filtered):", filter_rows(themes_df).head(100))
+        st.write("Meso (filtered):", filter_rows(meso_df).head(100))
\ No newline at end of file
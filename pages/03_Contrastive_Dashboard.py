@@ -1,8 +1,14 @@
 import os
 import streamlit as st
 import altair as alt
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 from datetime import date
+from lib.data_utils import STANCE_PATH, THEMES_PATH, MESO_PATH, STANCE_COLS, THEMES_COLS, MESO_COLS, cast_count, parse_month, data_version, parquet_models
 
 st.set_page_config(page_title="Contrastive Dashboard",
                    layout="wide",
@@ -12,49 +18,105 @@ st.title("Contrastive Dashboard")
 # ------------------------------------------------------------
 # Load precomputed aggregates from ./data (no DB round-trips)
 # ------------------------------------------------------------
-DATA_DIR = os.path.expanduser("./data")
-STANCE_PATH = os.path.join(DATA_DIR, "stance_monthly.parquet")
-THEMES_PATH = os.path.join(DATA_DIR, "themes_monthly.parquet")
-MESO_PATH   = os.path.join(DATA_DIR, "meso_monthly.parquet")
-
-# @st.cache_data(ttl="30m", show_spinner=True, max_entries=1)
-def load_parquets(stance_fp: str, themes_fp: str, meso_fp: str):
-    def _read_parquet(fp):
-        if not os.path.exists(fp):
-            return pd.DataFrame()
-        df = pd.read_parquet(fp)
-        if "month" in df.columns:
-            df["month"] = pd.to_datetime(df["month"] + "-01", errors="coerce")
-        if "source_domain" in df.columns:
-            df["source_domain"] = df["source_domain"].fillna("").astype(str)
-        if "model" in df.columns:
-            df["model"] = df["model"].fillna("").astype(str)
-        if "count" in df.columns:
-            df["count"] = pd.to_numeric(df["count"], errors="coerce").fillna(0).astype(int)
-        return df
-    stance_df = _read_parquet(stance_fp)
-    themes_df = _read_parquet(themes_fp)
-    meso_df = _read_parquet(meso_fp)
-    return stance_df, themes_df, meso_df
-
-stance_df, themes_df, meso_df = load_parquets(STANCE_PATH, THEMES_PATH, MESO_PATH)
+# The shared column lists minus model (a scan predicate here) and stance (stance
+# rows only supply article totals); everything else stays on disk.
+SKIP_COLS = ("model", "stance")
+
+# Part of the cache keys so that re-exported parquet files invalidate them.
+DATA_VERSION = data_version()
+
+def _month_key_bounds(start_date, end_date) -> tuple[str, str]:
+    # Rows are keyed by YYYY-MM and dated to the first of the month, so a month
+    # is in range iff start_date <= YYYY-MM-01 <= end_date.
+    first = start_date if start_date.day == 1 else (pd.Timestamp(start_date) + pd.offsets.MonthBegin(1)).date()
+    return first.strftime("%Y-%m"), end_date.strftime("%Y-%m")
+
+def _set(table: pa.Table, name: str, values) -> pa.Table:
+    return table.set_column(table.schema.get_field_index(name), name, values)
+
+@st.cache_resource(ttl="30m", show_spinner=True, max_entries=8)
+def load_parquets(stance_fp: str, themes_fp: str, meso_fp: str, model: str, start_date, end_date, data_version: tuple):
+    # One scan over all three files: the model and period predicates are pushed
+    # into the parquet reader once, rows are routed back to their file by the
+    # scan's __filename field, and only the chart columns are decoded.
+    kinds = [
+        (fp, [c for c in cols if c not in SKIP_COLS])
+        for fp, cols in ((stance_fp, STANCE_COLS), (themes_fp, THEMES_COLS), (meso_fp, MESO_COLS))
+    ]
+    present = [fp for fp, _ in kinds if os.path.exists(fp)]
+    if not present:
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    lo, hi = _month_key_bounds(start_date, end_date)
+    expr = (ds.field("month") >= lo) & (ds.field("month") <= hi)
+    if model:
+        expr = expr & (ds.field("model") == model)
+
+    schema = pa.unify_schemas([ds.dataset(fp, format="parquet").schema for fp in present])
+    dset = ds.dataset(present, format="parquet", schema=schema)
+    wanted = [c for c in dict.fromkeys(c for _, cols in kinds for c in cols) if c in schema.names]
+    table = dset.to_table(columns=["__filename"] + wanted, filter=expr, use_threads=True)
+
+    table = parse_month(table)
+    if "month" in table.column_names:
+        table = table.filter(pc.is_valid(table["month"]))
+    if "source_domain" in table.column_names:
+        table = _set(table, "source_domain", pc.fill_null(table["source_domain"], ""))
+    # Dictionary-encode the label columns: they arrive in pandas as categoricals,
+    # so each distinct string is stored once and domain filters compare int32 codes.
+    for col in ("source_domain", "theme", "meso_narrative"):
+        if col in table.column_names:
+            table = _set(table, col, pc.dictionary_encode(table[col]))
+    table = cast_count(table)
+
+    scanned_as = dict(zip(present, dset.files))  # paths as reported in __filename
+    out = []
+    for fp, columns in kinds:
+        if fp not in present:
+            out.append(pd.DataFrame())
+            continue
+        part = table.filter(pc.equal(table["__filename"], scanned_as[fp]))
+        out.append(part.select([c for c in columns if c in part.column_names]).to_pandas())
+    return tuple(out)
 
-if themes_df.empty and meso_df.empty:
+if not any(os.path.exists(fp) for fp in (THEMES_PATH, MESO_PATH)):
     st.error("No aggregates found. Please generate exports first (stance/themes/meso parquet files).")
     st.stop()
 
 # ------------------------------------------------------------
 # Helpers
 # ------------------------------------------------------------
-def global_date_bounds(dfs: list[pd.DataFrame]):
-    series = []
-    for df in dfs:
-        if not df.empty and "month" in df.columns:
-            series.append(df["month"])
-    if not series:
+def parquet_month_bounds(fp: str):
+    # Min/max of the YYYY-MM "month" column from the row-group statistics in the
+    # parquet footer; YYYY-MM strings order the same way as the months they name.
+    if not os.path.exists(fp):
+        return None
+    md = pq.ParquetFile(fp).metadata
+    if "month" not in md.schema.names:
+        return None
+    col = md.schema.names.index("month")
+    lows, highs = [], []
+    for rg in range(md.num_row_groups):
+        stats = md.row_group(rg).column(col).statistics
+        if stats is None or not stats.has_min_max:
+            months = pq.read_table(fp, columns=["month"]).column("month").to_pandas()
+            lows, highs = [months.min()], [months.max()]
+            break
+        lows.append(stats.min)
+        highs.append(stats.max)
+    if not lows:
+        return None
+    lo = pd.to_datetime(min(lows) + "-01", errors="coerce")
+    hi = pd.to_datetime(max(highs) + "-01", errors="coerce")
+    if pd.isna(lo) or pd.isna(hi):
+        return None
+    return lo, hi
+
+def global_date_bounds(fps: list[str]):
+    bounds = [b for b in (parquet_month_bounds(fp) for fp in fps) if b]
+    if not bounds:
         return None, None
-    all_months = pd.concat(series, ignore_index=True).dropna()
-    return all_months.min().date(), all_months.max().date()
+    return min(lo for lo, _ in bounds).date(), max(hi for _, hi in bounds).date()
 
 
 def _norm_date_input(p):
@@ -63,67 +125,123 @@ def _norm_date_input(p):
         return (min(a, b), max(a, b))
     return (p, p)
 
-def pick_domains_for_range(dfs: list[pd.DataFrame], model: str, start_date, end_date):
-    doms = set()
-    for df in dfs:
-        if df.empty or "month" not in df.columns:
-            continue
-        m = df[(df["month"].dt.date >= start_date) & (df["month"].dt.date <= end_date)].copy()
-        if model and "model" in m.columns:
-            m = m[m["model"] == model]
+@st.cache_data(ttl="30m", show_spinner=False, max_entries=32)
+def pick_domains_for_range(data_version: tuple, model: str, start_date, end_date, _dfs: tuple) -> list[str]:
+    # Keyed on (data version, model, period) only: the frames passed in are the
+    # ones loaded for that key (already restricted to it), and Filter A/B share
+    # the entry whenever they match.
+    labels = []
+    for m in _dfs:
         if "source_domain" in m.columns:
-            doms.update(m["source_domain"].dropna().unique().tolist())
-    return sorted([d for d in doms if d])
-
-def filter_slice(df: pd.DataFrame, model: str, start_date, end_date, domains: set | None):
-    if df.empty:
+            codes = m["source_domain"].cat.codes.to_numpy()
+            labels.append(m["source_domain"].cat.categories.take(np.unique(codes[codes >= 0])).to_numpy())
+    if not labels:
+        return []
+    # One hash-based union over the per-frame uniques, then an Arrow sort; strings
+    # become Python objects only in the final list handed to the widget.
+    doms = pa.array(pd.unique(np.concatenate(labels)), type=pa.string())
+    doms = doms.filter(pc.not_equal(doms, ""))
+    return doms.take(pc.sort_indices(doms)).to_pylist()
+
+def filter_slice(df: pd.DataFrame, domains: tuple | None):
+    # load_parquets already restricted the frame to its model and period, so only
+    # the domain filter is left
+    if df.empty or not domains or "source_domain" not in df.columns:
         return df
-    m = df[(df["month"].dt.date >= start_date) & (df["month"].dt.date <= end_date)].copy()
-    if model and "model" in m.columns:
-        m = m[m["model"] == model]
-    if domains and "source_domain" in m.columns:
-        m = m[m["source_domain"].isin(domains)]
-    return m
+    cat = df["source_domain"].cat
+    wanted = cat.categories.get_indexer(list(domains))
+    return df.loc[np.isin(cat.codes.to_numpy(), wanted[wanted >= 0])]
 
 def total_articles_from_stance(stance_slice: pd.DataFrame) -> int:
     if stance_slice.empty:
         return 0
     return int(stance_slice["count"].sum())
 
-def themes_counts(themes_slice: pd.DataFrame) -> pd.DataFrame:
-    if themes_slice.empty:
-        return pd.DataFrame(columns=["narrative theme", "articles"])
-    g = (
-        themes_slice.groupby("theme", as_index=False)["count"]
-        .sum()
-        .rename(columns={"theme": "narrative theme", "count": "articles"})
-    )
-    return g
-
-def meso_counts(meso_slice: pd.DataFrame) -> pd.DataFrame:
-    if meso_slice.empty:
-        return pd.DataFrame(columns=["meso narrative", "articles"])
-    g = (
-        meso_slice.groupby("meso_narrative", as_index=False)["count"]
-        .sum()
-        .rename(columns={"meso_narrative": "meso narrative", "count": "articles"})
-    )
-    return g
+def _label_codes(slice_df: pd.DataFrame, src_col: str, categories: pd.Index):
+    # Map a slice's categorical codes onto a shared category index; rows with a
+    # null label (code -1) are dropped, as groupby would.
+    if slice_df.empty or src_col not in slice_df.columns:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64)
+    cat = slice_df[src_col].cat
+    codes = cat.codes.to_numpy()
+    valid = codes >= 0
+    remap = categories.get_indexer(cat.categories)
+    return remap[codes[valid]], slice_df["count"].to_numpy(dtype=np.int64)[valid]
+
+def contrast_counts(slice_a: pd.DataFrame, slice_b: pd.DataFrame, src_col: str, label_col: str) -> pd.DataFrame:
+    # Per-item sums are np.bincount over shared int codes: a column sum of the
+    # (row x item) count matrix without materializing it. When both sides are the
+    # same slice it is counted once.
+    categories = pd.Index([], dtype=object)
+    for df in (slice_a, slice_b):
+        if src_col in df.columns:
+            categories = categories.union(df[src_col].cat.categories)
+    k = len(categories)
+    codes_a, counts_a = _label_codes(slice_a, src_col, categories)
+    articles_1 = np.bincount(codes_a, weights=counts_a, minlength=k).astype(np.int64)
+    seen = np.bincount(codes_a, minlength=k) > 0
+    if slice_b is slice_a:
+        articles_2 = articles_1
+    else:
+        codes_b, counts_b = _label_codes(slice_b, src_col, categories)
+        articles_2 = np.bincount(codes_b, weights=counts_b, minlength=k).astype(np.int64)
+        seen |= np.bincount(codes_b, minlength=k) > 0
+    rows = np.flatnonzero(seen)
+    g = pd.DataFrame({
+        label_col: categories.take(rows),
+        "articles_1": articles_1[rows],
+        "articles_2": articles_2[rows],
+    })
+    g["support_articles"] = g["articles_1"] + g["articles_2"]
+    return g.sort_values(label_col, kind="stable").reset_index(drop=True)
+
+@st.cache_data(ttl="30m", show_spinner=False, max_entries=64)
+def compute_counts(data_version: tuple, side_a: tuple, side_b: tuple, _frames_a: tuple, _frames_b: tuple):
+    # side_* = (model, start_date, end_date, sorted domains or None) together with
+    # the data version fully determines the frames loaded for it, so the frames
+    # themselves are not hashed.
+    # Min support and top N are applied by the caller on the cached result.
+    stance_a, themes_a, meso_a = (filter_slice(df, side_a[3]) for df in _frames_a)
+    if side_b == side_a:
+        # Identical filters: reuse side A's slices, contrast_counts groups them once.
+        stance_b, themes_b, meso_b = stance_a, themes_a, meso_a
+    else:
+        stance_b, themes_b, meso_b = (filter_slice(df, side_b[3]) for df in _frames_b)
+    total_a = total_articles_from_stance(stance_a)
+    total_b = total_a if stance_b is stance_a else total_articles_from_stance(stance_b)
+    themes_contrast = contrast_counts(themes_a, themes_b, "theme", "narrative theme")
+    meso_contrast = contrast_counts(meso_a, meso_b, "meso_narrative", "meso narrative")
+    return total_a, total_b, themes_contrast, meso_contrast
+
+def top_by_abs_diff(contrast: pd.DataFrame, n: int) -> pd.DataFrame:
+    # argpartition selects the n largest |diff| in O(N); only those n rows get sorted.
+    abs_diff = np.abs(contrast["diff_prevalence"].to_numpy(dtype=float))
+    idx = np.arange(len(abs_diff))
+    if n < len(abs_diff):
+        idx = np.sort(np.argpartition(-abs_diff, n - 1)[:n])
+    idx = idx[np.argsort(-abs_diff[idx], kind="stable")]
+    return contrast.iloc[idx].assign(abs_diff=abs_diff[idx])
+
+def diverging_long(top: pd.DataFrame, label_col: str) -> pd.DataFrame:
+    # One row per (item, side): A rows first, then B, with A drawn to the left.
+    label = top[label_col].to_numpy()
+    diff = top["diff_prevalence"].to_numpy()
+    prev_a = top["prevalence_1"].to_numpy(dtype=float)
+    prev_b = top["prevalence_2"].to_numpy(dtype=float)
+    a = pd.DataFrame({label_col: label, "diff_prevalence": diff, "prevalence": prev_a, "side_key": "A", "signed_prev": -prev_a})
+    b = pd.DataFrame({label_col: label, "diff_prevalence": diff, "prevalence": prev_b, "side_key": "B", "signed_prev": prev_b})
+    return pd.concat([a, b], ignore_index=True)
 
 # ------------------------------------------------------------
 # Sidebar controls (Filter A, Filter B, then Macros)
 # ------------------------------------------------------------
 # Available models (union from stance/themes/meso)
-available_models = sorted(set(
-    list(themes_df["model"].unique() if "model" in themes_df else []) +
-    list(stance_df["model"].unique() if "model" in stance_df else []) +
-    list(meso_df["model"].unique() if "model" in meso_df else [])
-))
+available_models = parquet_models([THEMES_PATH, STANCE_PATH, MESO_PATH], DATA_VERSION)
 if not available_models:
     st.error("No models available in aggregates.")
     st.stop()
 
-min_dt, max_dt = global_date_bounds([themes_df, stance_df, meso_df])
+min_dt, max_dt = global_date_bounds([THEMES_PATH, STANCE_PATH, MESO_PATH])
 if not min_dt or not max_dt:
     st.error("No valid 'month' column found in aggregates.")
     st.stop()
@@ -144,7 +262,8 @@ period_1_in = st.sidebar.date_input(
     key="period_1",
 )
 period_1 = _norm_date_input(period_1_in)
-domains_1_options = pick_domains_for_range([themes_df, stance_df, meso_df], selected_model_A, period_1[0], period_1[1])
+stance_1, themes_1, meso_1 = load_parquets(STANCE_PATH, THEMES_PATH, MESO_PATH, selected_model_A, period_1[0], period_1[1], DATA_VERSION)
+domains_1_options = pick_domains_for_range(DATA_VERSION, selected_model_A, period_1[0], period_1[1], (themes_1, stance_1, meso_1))
 default_1 = [d for d in domains_1_options if d == "theguardian.com"] or domains_1_options
 domains_1_selected = st.sidebar.multiselect("Source domain (A)", options=domains_1_options, default=default_1, key="domain_1")
 domains_1 = set(domains_1_selected) if domains_1_selected else None
@@ -165,7 +284,8 @@ period_2_in = st.sidebar.date_input(
     key="period_2",
 )
 period_2 = _norm_date_input(period_2_in)
-domains_2_options = pick_domains_for_range([themes_df, stance_df, meso_df], selected_model_B, period_2[0], period_2[1])
+stance_2, themes_2, meso_2 = load_parquets(STANCE_PATH, THEMES_PATH, MESO_PATH, selected_model_B, period_2[0], period_2[1], DATA_VERSION)
+domains_2_options = pick_domains_for_range(DATA_VERSION, selected_model_B, period_2[0], period_2[1], (themes_2, stance_2, meso_2))
 default_2 = [d for d in domains_2_options if d == "telegraph.co.uk"] or domains_2_options
 domains_2_selected = st.sidebar.multiselect("Source domain (B)", options=domains_2_options, default=default_2, key="domain_2")
 domains_2 = set(domains_2_selected) if domains_2_selected else None
@@ -184,50 +304,26 @@ st.sidebar.markdown("---")
 # ------------------------------------------------------------
 # Compute contrast using aggregates
 # ------------------------------------------------------------
-# Slices
-stance_a = filter_slice(stance_df, selected_model_A, period_1[0], period_1[1], domains_1)
-stance_b = filter_slice(stance_df, selected_model_B, period_2[0], period_2[1], domains_2)
-themes_a = filter_slice(themes_df, selected_model_A, period_1[0], period_1[1], domains_1)
-themes_b = filter_slice(themes_df, selected_model_B, period_2[0], period_2[1], domains_2)
-meso_a   = filter_slice(meso_df,   selected_model_A, period_1[0], period_1[1], domains_1)
-meso_b   = filter_slice(meso_df,   selected_model_B, period_2[0], period_2[1], domains_2)
-
-# Denominators (relevant articles)
-total_a = total_articles_from_stance(stance_a)
-total_b = total_articles_from_stance(stance_b)
-
-# Aggregate counts
-themes_a_counts = themes_counts(themes_a).rename(columns={"articles": "articles_1"})
-themes_b_counts = themes_counts(themes_b).rename(columns={"articles": "articles_2"})
-meso_a_counts   = meso_counts(meso_a).rename(columns={"articles": "articles_1"})
-meso_b_counts   = meso_counts(meso_b).rename(columns={"articles": "articles_2"})
+side_a = (selected_model_A, period_1[0], period_1[1], tuple(sorted(domains_1)) if domains_1 else None)
+side_b = (selected_model_B, period_2[0], period_2[1], tuple(sorted(domains_2)) if domains_2 else None)
+
+# Denominators (relevant articles) and per-item counts for A and B, cached per filter pair
+total_a, total_b, themes_contrast, meso_contrast = compute_counts(
+    DATA_VERSION, side_a, side_b, (stance_1, themes_1, meso_1), (stance_2, themes_2, meso_2)
+)
+
+# Drop low-support items before deriving prevalence
+if min_support > 0:
+    themes_contrast = themes_contrast.loc[themes_contrast["support_articles"].to_numpy() >= int(min_support)]
+    meso_contrast = meso_contrast.loc[meso_contrast["support_articles"].to_numpy() >= int(min_support)]
 
 # ------------------------------------------------------------
-# Themes contrast
-# ------------------------------------------------------------
-themes_contrast = pd.merge(themes_a_counts, themes_b_counts, on="narrative theme", how="outer").fillna(0)
-if not themes_contrast.empty:
-    themes_contrast["articles_1"] = themes_contrast["articles_1"].astype(int)
-    themes_contrast["articles_2"] = themes_contrast["articles_2"].astype(int)
-    themes_contrast["prevalence_1"] = (themes_contrast["articles_1"] / total_a) if total_a > 0 else 0.0
-    themes_contrast["prevalence_2"] = (themes_contrast["articles_2"] / total_b) if total_b > 0 else 0.0
-    themes_contrast["diff_prevalence"] = themes_contrast["prevalence_2"] - themes_contrast["prevalence_1"]
-    themes_contrast["support_articles"] = themes_contrast["articles_1"] + themes_contrast["articles_2"]
-    if min_support > 0:
-        themes_contrast = themes_contrast[themes_contrast["support_articles"] >= int(min_support)].copy()
-# ------------------------------------------------------------
-# Meso narratives contrast
+# Themes / meso narratives contrast
 # ------------------------------------------------------------
-meso_contrast = pd.merge(meso_a_counts, meso_b_counts, on="meso narrative", how="outer").fillna(0)
-if not meso_contrast.empty:
-    meso_contrast["articles_1"] = meso_contrast["articles_1"].astype(int)
-    meso_contrast["articles_2"] = meso_contrast["articles_2"].astype(int)
-    meso_contrast["prevalence_1"] = (meso_contrast["articles_1"] / total_a) if total_a > 0 else 0.0
-    meso_contrast["prevalence_2"] = (meso_contrast["articles_2"] / total_b) if total_b > 0 else 0.0
-    meso_contrast["diff_prevalence"] = meso_contrast["prevalence_2"] - meso_contrast["prevalence_1"]
-    meso_contrast["support_articles"] = meso_contrast["articles_1"] + meso_contrast["articles_2"]
-    if min_support > 0:
-        meso_contrast = meso_contrast[meso_contrast["support_articles"] >= int(min_support)].copy()
+for contrast in (themes_contrast, meso_contrast):
+    contrast["prevalence_1"] = (contrast["articles_1"] / total_a) if total_a > 0 else 0.0
+    contrast["prevalence_2"] = (contrast["articles_2"] / total_b) if total_b > 0 else 0.0
+    contrast["diff_prevalence"] = contrast["prevalence_2"] - contrast["prevalence_1"]
 
 # If both empty after filtering, stop
 if (themes_contrast is None or themes_contrast.empty) and (meso_contrast is None or meso_contrast.empty):
@@ -251,29 +347,22 @@ legend_html = f"""
 """
 st.markdown(legend_html, unsafe_allow_html=True)
 
+# Top N items, shared by the charts and the raw data expanders
+top_themes = top_by_abs_diff(themes_contrast, int(top_n))
+top_meso = top_by_abs_diff(meso_contrast, int(top_n))
+
 # ------------------------------------------------------------
 # Plot: Themes diverging bar (B minus A)
 # ------------------------------------------------------------
 if not themes_contrast.empty:
-    plot_df = themes_contrast.copy()
-    plot_df["abs_diff"] = plot_df["diff_prevalence"].abs()
-    top_themes = plot_df.sort_values("abs_diff", ascending=False).head(int(top_n)).copy()
-
-    melt_themes = top_themes[["narrative theme", "prevalence_1", "prevalence_2", "diff_prevalence"]].copy().reset_index(drop=True)
-    melt_themes = melt_themes.melt(
-        id_vars=["narrative theme", "diff_prevalence"],
-        value_vars=["prevalence_1", "prevalence_2"],
-        var_name="side_var",
-        value_name="prevalence"
-    )
-    melt_themes["side_key"] = melt_themes["side_var"].map({"prevalence_1": "A", "prevalence_2": "B"})
-    melt_themes["signed_prev"] = melt_themes.apply(lambda r: -r["prevalence"] if r["side_key"] == "A" else r["prevalence"], axis=1)
+    # Top N rows only: passed to Altair as inline records, skipping its DataFrame sanitizing
+    melt_themes = diverging_long(top_themes, "narrative theme")
 
     theme_order = melt_themes.drop_duplicates("narrative theme").sort_values("diff_prevalence")["narrative theme"].tolist()
     max_val_t = float(melt_themes["prevalence"].max() or 0.0)
     x_limit_t = (max_val_t * 1.15) if max_val_t > 0 else 0.05
 
-    themes_bar = alt.Chart(melt_themes).mark_bar().encode(
+    themes_bar = alt.Chart(alt.Data(values=melt_themes.to_dict(orient="records"))).mark_bar().encode(
         x=alt.X("signed_prev:Q", title="Prevalence (% of relevant articles)", scale=alt.Scale(domain=[-x_limit_t, x_limit_t], nice=False), axis=alt.Axis(format=".0%")),
         y=alt.Y("narrative theme:N", sort=theme_order, title="Theme", axis=alt.Axis(labelLimit=0, labelOverlap=False, titlePadding=120)),
         color=alt.Color("side_key:N", title=None, scale=alt.Scale(domain=["A", "B"], range=["#d7191c", "#2c7bb6"]), legend=alt.Legend(orient="top")),
@@ -291,25 +380,13 @@ if not themes_contrast.empty:
 # Plot: Meso narratives diverging bar (B minus A)
 # ------------------------------------------------------------
 if not meso_contrast.empty:
-    meso_plot = meso_contrast.copy()
-    meso_plot["abs_diff"] = meso_plot["diff_prevalence"].abs()
-    top_meso = meso_plot.sort_values("abs_diff", ascending=False).head(int(top_n)).copy()
-
-    melt_meso = top_meso[["meso narrative", "prevalence_1", "prevalence_2", "diff_prevalence"]].copy().reset_index(drop=True)
-    melt_meso = melt_meso.melt(
-        id_vars=["meso narrative", "diff_prevalence"],
-        value_vars=["prevalence_1", "prevalence_2"],
-        var_name="side_var",
-        value_name="prevalence"
-    )
-    melt_meso["side_key"] = melt_meso["side_var"].map({"prevalence_1": "A", "prevalence_2": "B"})
-    melt_meso["signed_prev"] = melt_meso.apply(lambda r: -r["prevalence"] if r["side_key"] == "A" else r["prevalence"], axis=1)
+    melt_meso = diverging_long(top_meso, "meso narrative")
 
     meso_order = melt_meso.drop_duplicates("meso narrative").sort_values("diff_prevalence")["meso narrative"].tolist()
     max_val_m = float(melt_meso["prevalence"].max() or 0.0)
     x_limit_m = (max_val_m * 1.15) if max_val_m > 0 else 0.05
 
-    meso_bar = alt.Chart(melt_meso).mark_bar().encode(
+    meso_bar = alt.Chart(alt.Data(values=melt_meso.to_dict(orient="records"))).mark_bar().encode(
         x=alt.X("signed_prev:Q", title="Prevalence (% of relevant articles)", scale=alt.Scale(domain=[-x_limit_m, x_limit_m], nice=False), axis=alt.Axis(format=".0%")),
         y=alt.Y("meso narrative:N", sort=meso_order, title="Meso Narrative", axis=alt.Axis(labelLimit=0, labelOverlap=False, titlePadding=220)),
         # y=alt.Y("meso_narrative:N", sort=meso_order, axis=alt.Axis(labelLimit=0, labelOverlap=False,titleAngle=270, titlePadding=300, labelPadding=6), title="Meso Narrative"),
@@ -328,9 +405,6 @@ if not meso_contrast.empty:
 # Raw data expanders
 # ------------------------------------------------------------
 if not themes_contrast.empty:
-    plot_df = themes_contrast.copy()
-    plot_df["abs_diff"] = plot_df["diff_prevalence"].abs()
-    top_themes = plot_df.sort_values("abs_diff", ascending=False).head(int(top_n)).copy()
     with st.expander("Raw Themes Contrast Data"):
         st.dataframe(top_themes[[
             "narrative theme",
@@ -1,8 +1,16 @@
 import os
+import json
+import time
+import hashlib
+import uuid
 import streamlit as st
 import altair as alt
+import numpy as np
 import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from datetime import date
+from lib.data_utils import DATA_DIR, STANCE_PATH, THEMES_PATH, MESO_PATH, STANCE_COLS, THEMES_COLS, MESO_COLS, cast_count, parse_month, data_version, parquet_models
 
 st.set_page_config(page_title="Temporal Dashboard",
                    layout="wide",
@@ -24,35 +32,47 @@ st.title("Temporal Dashboard")
 # -------------------------------------
 # Load precomputed aggregates (Parquet)
 # -------------------------------------
-DATA_DIR = os.path.expanduser("./data")
-STANCE_PATH = os.path.join(DATA_DIR, "stance_monthly.parquet")
-THEMES_PATH = os.path.join(DATA_DIR, "themes_monthly.parquet")
-MESO_PATH   = os.path.join(DATA_DIR, "meso_monthly.parquet")
-
-# @st.cache_data(ttl="30m", show_spinner=True, max_entries=1)
-def load_parquets(stance_fp: str, themes_fp: str, meso_fp: str):
-    def _read_parquet(fp):
+# On-disk side cache for computed time series; unlike st.cache_data it is
+# shared across server processes and survives restarts.
+CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+SIDE_CACHE_TTL = 3600  # seconds
+
+# Part of the chart aggregate cache keys so that re-exported parquet files invalidate them.
+DATA_VERSION = data_version()
+
+@st.cache_resource(ttl="30m", show_spinner=True, max_entries=4)
+def load_parquets(stance_fp: str, themes_fp: str, meso_fp: str, model: str, data_version: tuple):
+    # One cached set of frames per model (and file version). pq.read_table pushes
+    # the model predicate and column projection into the parquet reader, and
+    # dtype normalization runs on the Arrow table, so only the selected model's
+    # rows reach pandas. Cached as a resource: pages only read these frames.
+    def _read_parquet(fp, columns):
         if not os.path.exists(fp):
             return pd.DataFrame()
-        df = pd.read_parquet(fp)
-        if "month" in df.columns:
-            df["month"] = pd.to_datetime(df["month"] + "-01", errors="coerce")
-        if "source_domain" in df.columns:
-            df["source_domain"] = df["source_domain"].fillna("").astype(str)
-        if "model" in df.columns:
-            df["model"] = df["model"].fillna("").astype(str)
-        if "count" in df.columns:
-            df["count"] = pd.to_numeric(df["count"], errors="coerce").fillna(0).astype(int)
+        names = pq.read_schema(fp).names
+        table = pq.read_table(
+            fp,
+            columns=[c for c in columns if c in names],
+            filters=[("model", "=", model)] if "model" in names else None,
+        )
+        table = parse_month(table)
+        for col in ("source_domain", "model"):
+            if col in table.column_names:
+                table = table.set_column(table.schema.get_field_index(col), col, pc.fill_null(table[col], ""))
+        df = cast_count(table).to_pandas()
+        # Label columns as categoricals (sorted categories): groupbys and isin
+        # filters then work on int codes, and group order stays alphabetical.
+        for col in ("source_domain", "model", "stance", "theme", "meso_narrative"):
+            if col in df.columns:
+                df[col] = df[col].astype("category")
         return df
 
-    stance_df = _read_parquet(stance_fp)
-    themes_df = _read_parquet(themes_fp)
-    meso_df   = _read_parquet(meso_fp)
+    stance_df = _read_parquet(stance_fp, STANCE_COLS)
+    themes_df = _read_parquet(themes_fp, THEMES_COLS)
+    meso_df   = _read_parquet(meso_fp, MESO_COLS)
     return stance_df, themes_df, meso_df
 
-stance_df, themes_df, meso_df = load_parquets(STANCE_PATH, THEMES_PATH, MESO_PATH)
-
-if stance_df.empty and themes_df.empty:
+if not any(os.path.exists(fp) for fp in (STANCE_PATH, THEMES_PATH)):
     st.error(f"No aggregates found in {DATA_DIR}. Ensure stance_monthly.parquet and themes_monthly.parquet exist.")
     st.stop()
 
@@ -71,65 +91,50 @@ def _time_axis_and_scale(freq_label: str):
         scale = alt.Scale(nice={"interval": "year", "step": 1})
     return axis, scale
 
-def _freq_to_pandas(freq_label: str) -> str:
-    # Use pandas-supported period codes:
-    # - Weekly anchored to Monday
-    # - Monthly period ('M')
-    # - Yearly period ('A-DEC')
-    return {"Weekly": "W-MON", "Monthly": "M", "Yearly": "Y-DEC"}[freq_label]
-
 def add_period(df: pd.DataFrame, freq_label: str) -> pd.DataFrame:
     if df.empty or "month" not in df.columns:
         return df
-    freq = _freq_to_pandas(freq_label)
-    out = df.copy()
-    # Convert to Period, then to start-of-period Timestamp
-    out["period"] = out["month"].dt.to_period(freq).dt.start_time
-    return out
-
-def available_models_union(*dfs):
-    models = set()
-    for df in dfs:
-        if not df.empty and "model" in df.columns:
-            models.update(df["model"].dropna().unique().tolist())
-    return sorted([m for m in models if m])
+    months = df["month"].to_numpy()
+    if freq_label == "Weekly":
+        # Same buckets as pandas' W-MON periods (weeks ending Monday): step back to
+        # the Tuesday on or before each date; 1970-01-06 (epoch day 5) was a Tuesday.
+        days = months.astype("datetime64[D]")
+        start = days - ((days.view("i8") - 5) % 7).astype("timedelta64[D]")
+    else:
+        # Truncate to the start of the month/year with datetime64 unit casts
+        start = months.astype({"Monthly": "datetime64[M]", "Yearly": "datetime64[Y]"}[freq_label])
+    return df.assign(period=start.astype(months.dtype))
 
 # -------------------------------------
 # Sidebar controls (Model, Time, Domain)
 # -------------------------------------
 # Model selector
-models = available_models_union(stance_df, themes_df)
+models = parquet_models([STANCE_PATH, THEMES_PATH], DATA_VERSION)
 default_model = "gpt-oss-20b" if "gpt-oss-20b" in models else (models[0] if models else None)
 if not models:
     st.error("No models found in aggregates.")
     st.stop()
 selected_model = st.sidebar.selectbox("Model", options=models, index=models.index(default_model) if default_model in models else 0)
 
-# Date bounds across selected model
-def model_filter(df):
-    if df.empty or "model" not in df.columns:
-        return df
-    return df[df["model"] == selected_model].copy()
-
 st.sidebar.markdown("---")
 # if st.sidebar.button("🧹 Clear Cache (if slow)"):
 #     st.cache_data.clear()
 #     st.success("Cache cleared! Refresh to reload data.")
 
 
-stance_m = model_filter(stance_df)
-themes_m = model_filter(themes_df)
-meso_m   = model_filter(meso_df)
+# Only the selected model's rows are read
+stance_m, themes_m, meso_m = load_parquets(STANCE_PATH, THEMES_PATH, MESO_PATH, selected_model, DATA_VERSION)
 
-date_series = []
+# Date bounds across selected model: per-frame min/max (NaT skipped), no concat
+mins, maxs = [], []
 for df in (stance_m, themes_m):
-    if not df.empty and "month" in df.columns:
-        date_series.append(df["month"])
+    if not df.empty and "month" in df.columns and df["month"].notna().any():
+        mins.append(df["month"].min())
+        maxs.append(df["month"].max())
 
-if date_series:
-    all_months = pd.concat(date_series, ignore_index=True).dropna()
-    min_dt = all_months.min().date()
-    max_dt = all_months.max().date()
+if mins:
+    min_dt = min(mins).date()
+    max_dt = max(maxs).date()
 else:
     st.error("No valid 'month' column found for the selected model.")
     st.stop()
@@ -144,91 +149,153 @@ if isinstance(picked, tuple) and len(picked) == 2:
 else:
     start_date = end_date = picked
 
-def date_filter(df: pd.DataFrame):
+# Half-open [start, end + 1 day) bounds compare directly against datetime64 months
+start_ts = pd.Timestamp(start_date)
+end_ts = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+
+def apply_filters(df: pd.DataFrame, domains=None):
+    # Date range and (optionally) domains as one boolean mask; .loc returns the
+    # selected rows, nothing downstream mutates them, so no extra .copy().
     if df.empty or "month" not in df.columns:
         return df
-    return df[(df["month"].dt.date >= start_date) & (df["month"].dt.date <= end_date)].copy()
-
-stance_f = date_filter(stance_m)
-themes_f = date_filter(themes_m)
-meso_f   = date_filter(meso_m)
+    m = (df["month"] >= start_ts) & (df["month"] < end_ts)
+    if domains and "source_domain" in df.columns:
+        m &= df["source_domain"].isin(domains)
+    return df.loc[m]
 
 # Domain filter (defaults to all domains in filtered range)
-domains = set()
-for df in (stance_f, themes_f, meso_f):
-    if not df.empty and "source_domain" in df.columns:
-        domains.update(df["source_domain"].dropna().unique().tolist())
-domains = sorted([d for d in domains if d])
+# One hash-unique pass over the concatenated domain columns (nulls are filled with "" on load)
+arrs = [
+    apply_filters(df[["month", "source_domain"]])["source_domain"].to_numpy()
+    for df in (stance_m, themes_m, meso_m)
+    if not df.empty and "source_domain" in df.columns
+]
+domains = [d for d in np.sort(pd.unique(np.concatenate(arrs))).tolist() if d] if arrs else []
 default_domains = ['UK Parliament (Con)','UK Parliament (Lab)','US Congress (Rep)','US Congress (Dem)', 'dailymail.co.uk','telegraph.co.uk', 'theguardian.com','bbc.co.uk','independent.co.uk','thesun.co.uk','mirror.co.uk']
 default_domains = [d for d in default_domains if d in domains]
 selected_domains = st.sidebar.multiselect("Source domain", options=domains,
                                           default=default_domains)
 
-def domain_filter(df: pd.DataFrame):
-    if df.empty or not selected_domains or "source_domain" not in df.columns:
-        return df
-    return df[df["source_domain"].isin(selected_domains)].copy()
-
-stance_f = domain_filter(stance_f)
-themes_f = domain_filter(themes_f)
-meso_f   = domain_filter(meso_f)
-
-# Add period column post-filter
-stance_p = add_period(stance_f, freq_label)
-themes_p = add_period(themes_f, freq_label)
-meso_p   = add_period(meso_f, freq_label)
+stance_f = apply_filters(stance_m, selected_domains)
+themes_f = apply_filters(themes_m, selected_domains)
+meso_f   = apply_filters(meso_m, selected_domains)
 
 # -------------------------------------
-# Build denominators (total relevant per period)
+# Cached per-chart aggregates
 # -------------------------------------
-# Total relevant articles per period from stance counts (sum across labels)
-if not stance_p.empty:
-    totals_per_period = (
-        stance_p.groupby("period", as_index=False)["count"]
+# File names carry the data version so entries for re-exported parquets can be
+# told apart (and deleted) without opening them.
+SIDE_CACHE_PREFIX = "temporal_" + hashlib.sha1(json.dumps(DATA_VERSION).encode()).hexdigest()[:8] + "_"
+
+def _side_cache_path(name: str, *key) -> str:
+    digest = hashlib.sha1(json.dumps(key, default=str).encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{SIDE_CACHE_PREFIX}{name}_{digest}.parquet")
+
+def _prune_side_cache():
+    # Delete entries from other data versions and entries past the TTL
+    now = time.time()
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    for fname in names:
+        if not fname.startswith("temporal_"):
+            continue
+        fp = os.path.join(CACHE_DIR, fname)
+        try:
+            if not fname.startswith(SIDE_CACHE_PREFIX) or now - os.path.getmtime(fp) >= SIDE_CACHE_TTL:
+                os.remove(fp)
+        except OSError:
+            pass
+
+def _read_side_cache(path: str):
+    # None when missing, older than the TTL, or unreadable
+    try:
+        if time.time() - os.path.getmtime(path) < SIDE_CACHE_TTL:
+            return pd.read_parquet(path)
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _write_side_cache(path: str, df: pd.DataFrame):
+    # Best effort: write to a temp file and rename so readers never see a partial file
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _prune_side_cache()
+        # Sessions are threads of one process: the tmp name must be unique per writer
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        df.to_parquet(tmp, compression="zstd")
+        os.replace(tmp, path)
+    except (OSError, ValueError):
+        pass
+
+# Keyed on (data version, model, granularity, date range, domains); the filtered
+# frame passed in is fully determined by that key, so it is not hashed. Widget
+# changes that don't touch the key (theme/meso pickers) rerender from the cache.
+@st.cache_data(ttl="1h", show_spinner=False, max_entries=32)
+def build_stance_ts(data_version: tuple, model: str, freq_label: str, start_date, end_date, domains: tuple, _stance_f: pd.DataFrame):
+    # Returns (stance score per period x domain, total relevant articles per period)
+    if _stance_f.empty:
+        return pd.DataFrame(), pd.Series(dtype="int64", name="total")
+    key = (data_version, model, freq_label, start_date, end_date, domains)
+    ts_path, totals_path = _side_cache_path("stance", *key), _side_cache_path("totals", *key)
+    cached_ts, cached_totals = _read_side_cache(ts_path), _read_side_cache(totals_path)
+    if cached_ts is not None and cached_totals is not None:
+        return cached_ts, cached_totals["total"]
+    stance_p = add_period(_stance_f, freq_label)
+
+    # Total relevant articles per period from stance counts (sum across labels),
+    # indexed by period so the prevalence builders can .map it instead of merging
+    totals_per_period = stance_p.groupby("period")["count"].sum().rename("total")
+
+    # One groupby over period x domain with a conditional sum per stance label
+    counts = stance_p["count"].to_numpy()
+    pivot = pd.DataFrame({
+        "period": stance_p["period"].to_numpy(),
+        "source_domain": stance_p["source_domain"].array,
+        **{col: np.where((stance_p["stance"] == col).to_numpy(), counts, 0) for col in ["OPEN", "RESTRICTIVE", "NEUTRAL"]},
+    }).groupby(["period", "source_domain"], as_index=False, observed=True).sum()
+
+    pivot["total"] = pivot["OPEN"] + pivot["RESTRICTIVE"] + pivot["NEUTRAL"]
+    total = pivot["total"].to_numpy()
+    score = np.full(total.shape, np.nan)
+    np.divide((pivot["OPEN"] - pivot["RESTRICTIVE"]).to_numpy(), total, out=score, where=total > 0)
+    pivot["stance_score"] = score
+    stance_ts = pivot.dropna(subset=["stance_score"])
+    _write_side_cache(ts_path, stance_ts)
+    _write_side_cache(totals_path, totals_per_period.to_frame())
+    return stance_ts, totals_per_period
+
+@st.cache_data(ttl="1h", show_spinner=False, max_entries=64)
+def build_prevalence_ts(label_col: str, data_version: tuple, model: str, freq_label: str, start_date, end_date, domains: tuple, _df_f: pd.DataFrame, _totals_per_period: pd.Series):
+    # Articles and prevalence (share of the period's relevant articles) per period x label
+    path = _side_cache_path(label_col, data_version, model, freq_label, start_date, end_date, domains)
+    cached = _read_side_cache(path)
+    if cached is not None:
+        return cached
+    df_p = add_period(_df_f, freq_label)
+    ts = (
+        df_p.groupby(["period", label_col], as_index=False, observed=True)["count"]
         .sum()
-        .rename(columns={"count": "total"})
+        .rename(columns={"count": "articles"})
     )
-else:
-    totals_per_period = pd.DataFrame(columns=["period", "total"])
+    ts["total"] = ts["period"].map(_totals_per_period)
+    total = ts["total"].to_numpy(dtype=float, na_value=0.0)
+    ts["prevalence"] = np.divide(ts["articles"].to_numpy(dtype=float), total, out=np.zeros(total.shape), where=total > 0)
+    _write_side_cache(path, ts)
+    return ts
 
+agg_key = (DATA_VERSION, selected_model, freq_label, start_date, end_date, tuple(sorted(selected_domains)))
+stance_ts, totals_per_period = build_stance_ts(*agg_key, stance_f)
 
 # -------------------------------------
 # Stance: temporal stance-score lines (by domain)
 # Score = (OPEN - RESTRICTIVE) / (OPEN + RESTRICTIVE + NEUTRAL)
 # -------------------------------------
 st.subheader("Stance Toward Migration Over Time (by Domain)")
-if stance_p.empty:
+if stance_f.empty:
     st.info("No stance data in selected filters.")
 else:
-    # Sum per period x domain x stance
-    stance_sum = (
-        stance_p.groupby(["period", "source_domain", "stance"], as_index=False)["count"]
-        .sum()
-        .rename(columns={"count": "articles"})
-    )
-    # Pivot to OPEN/RESTRICTIVE/NEUTRAL columns
-    pivot = stance_sum.pivot_table(
-        index=["period", "source_domain"],
-        columns="stance",
-        values="articles",
-        aggfunc="sum",
-        fill_value=0
-    ).reset_index()
-
-    for col in ["OPEN", "RESTRICTIVE", "NEUTRAL"]:
-        if col not in pivot.columns:
-            pivot[col] = 0
-
-    pivot["total"] = pivot["OPEN"] + pivot["RESTRICTIVE"] + pivot["NEUTRAL"]
-    pivot["stance_score"] = pivot.apply(
-        lambda r: (r["OPEN"] - r["RESTRICTIVE"]) / r["total"] if r["total"] > 0 else None, axis=1
-    )
-    stance_ts = pivot.dropna(subset=["stance_score"]).copy()
-
-    # Keep only selected domains (already filtered, but safe)
-    if selected_domains:
-        stance_ts = stance_ts[stance_ts["source_domain"].isin(selected_domains)].copy()
-
     if stance_ts.empty:
         st.info("No stance series to plot after filtering.")
     else:
@@ -255,25 +322,16 @@ else:
 # -------------------------------------
 # Themes: temporal prevalence lines
 # -------------------------------------
-if themes_p.empty or totals_per_period.empty:
+if themes_f.empty or totals_per_period.empty:
     st.info("No theme data in selected filters.")
 else:
-    themes_counts = (
-        themes_p.groupby(["period", "theme"], as_index=False)["count"]
-        .sum()
-        .rename(columns={"count": "articles"})
-    )
-    themes_ts = themes_counts.merge(totals_per_period, on="period", how="left")
-    themes_ts["prevalence"] = themes_ts.apply(
-        lambda r: (r["articles"] / r["total"]) if r["total"] and r["total"] > 0 else 0.0, axis=1
-    )
+    themes_ts = build_prevalence_ts("theme", *agg_key, themes_f, totals_per_period)
 
     # Top themes overall in the window to drive selection
     overall_themes = (
-        themes_ts.groupby("theme")["articles"]
+        themes_ts.groupby("theme", observed=True)["articles"]
         .sum()
-        .sort_values(ascending=False)
-        .head(30)
+        .nlargest(30)
         .index.tolist()
     )
     selected_themes = st.multiselect(
@@ -283,7 +341,8 @@ else:
     )
     if not selected_themes:
         selected_themes = overall_themes[:8]
-    plot_themes = themes_ts[themes_ts["theme"].isin(selected_themes)].copy()
+    # Only the encoded/tooltip columns go into the embedded chart data
+    plot_themes = themes_ts.loc[themes_ts["theme"].isin(selected_themes), ["period", "theme", "articles", "prevalence"]]
 
     axis_x, scale_x = _time_axis_and_scale(freq_label)
     line = alt.Chart(plot_themes).mark_line(point=True).encode(
@@ -305,25 +364,16 @@ else:
 # Meso narratives: temporal prevalence lines
 # -------------------------------------
 st.subheader("Meso Narratives Over Time")
-if meso_p.empty or totals_per_period.empty:
+if meso_f.empty or totals_per_period.empty:
     st.info("No meso narrative data in selected filters.")
 else:
-    meso_counts = (
-        meso_p.groupby(["period", "meso_narrative"], as_index=False)["count"]
-        .sum()
-        .rename(columns={"count": "articles"})
-    )
-    meso_ts = meso_counts.merge(totals_per_period, on="period", how="left")
-    meso_ts["prevalence"] = meso_ts.apply(
-        lambda r: (r["articles"] / r["total"]) if r["total"] and r["total"] > 0 else 0.0, axis=1
-    )
+    meso_ts = build_prevalence_ts("meso_narrative", *agg_key, meso_f, totals_per_period)
 
     # Top 5 meso narratives in current window
     top_meso = (
-        meso_ts.groupby("meso_narrative")["articles"]
+        meso_ts.groupby("meso_narrative", observed=True)["articles"]
         .sum()
-        .sort_values(ascending=False)
-        .head(5)
+        .nlargest(5)
         .index.tolist()
     )
     selected_meso = st.multiselect(
@@ -334,7 +384,7 @@ else:
     if not selected_meso:
         selected_meso = top_meso
 
-    plot_meso = meso_ts[meso_ts["meso_narrative"].isin(selected_meso)].copy()
+    plot_meso = meso_ts.loc[meso_ts["meso_narrative"].isin(selected_meso), ["period", "meso_narrative", "articles", "prevalence"]]
 
     axis_x, scale_x = _time_axis_and_scale(freq_label)
     meso_line = alt.Chart(plot_meso).mark_line(point=True).encode(
@@ -355,6 +405,11 @@ else:
 
 
 with st.expander("Underlying Data Snapshots"):
-    st.write("Themes (filtered):", themes_f.head(100))
-    st.write("Stance (filtered):", stance_f.head(100))
-    st.write("Meso (filtered):", meso_f.head(100))
\ No newline at end of file
+    # Expander bodies run even when collapsed; only serialize the samples on request
+    if st.checkbox("Show samples", value=False):
+        st.caption("Themes (filtered)")
+        st.dataframe(themes_f.head(100), width="stretch")
+        st.caption("Stance (filtered)")
+        st.dataframe(stance_f.head(100), width="stretch")
+        st.caption("Meso (filtered)")
+        st.dataframe(meso_f.head(100), width="stretch")
\ No newline at end of file
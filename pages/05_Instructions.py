@@ -6,18 +6,16 @@ st.set_page_config(
     page_icon=".streamlit/static/MigNar_icon.png"
 )
 
-st.title("📖 MigNar Platform Instructions")
-
-st.markdown("""
-Welcome to the MigNar platform! This guide explains how to use the different features of this application.
-""")
+# Static page content, rendered as a few markdown blobs instead of one call per section
 
 # ═══════════════════════════════════════════════════════════════════════════
-# Section 1: Hierarchical Labeling System
+# Intro, Section 1: Hierarchical Labeling System, Section 2: Dashboard Pages
 # ═══════════════════════════════════════════════════════════════════════════
-st.header("1. Understanding the Hierarchical Labeling System")
+OVERVIEW_MD = """
+Welcome to the MigNar platform! This guide explains how to use the different features of this application.
+
+## 1. Understanding the Hierarchical Labeling System
 
-st.markdown("""
 MigNar uses a **three-level hierarchical approach** to analyze migration narratives in news articles:
 
 ### 🔹 Level 1: Stance
@@ -61,19 +59,13 @@ Each article can have:
 - **One stance** (the dominant position)
 - **Multiple themes** (different topics discussed)
 - **Multiple meso narratives** (specific storylines within each theme)
-""")
 
-# ═══════════════════════════════════════════════════════════════════════════
-# Section 2: Using the Dashboard Pages
-# ═══════════════════════════════════════════════════════════════════════════
-st.header("2. Using the Dashboard Pages")
+## 2. Using the Dashboard Pages
 
-st.markdown("""
 The MigNar platform includes three main dashboard views for analyzing migration narratives across different dimensions.
-""")
 
-st.subheader("📊 Aggregative Dashboard")
-st.markdown("""
+### 📊 Aggregative Dashboard
+
 **Purpose**: View overall volume and distribution of narratives across all articles in your dataset.
 
 **What you can do**:
@@ -90,10 +82,9 @@ st.markdown("""
 2. Choose a date range to focus on specific time periods
 3. Optionally filter by news source domain
 4. View the bar charts showing top themes and meso narratives by article count
-""")
 
-st.subheader("⚖️ Contrastive Dashboard")
-st.markdown("""
+### ⚖️ Contrastive Dashboard
+
 **Purpose**: Compare how narratives differ across different categories (e.g., news sources, stances, time periods).
 
 **What you can do**:
@@ -109,10 +100,9 @@ st.markdown("""
 2. Choose specific categories to compare
 3. Examine side-by-side visualizations showing narrative differences
 4. Look for exclusive narratives (appearing in only one category) vs. shared narratives
-""")
 
-st.subheader("📈 Temporal Dashboard")
-st.markdown("""
+### 📈 Temporal Dashboard
+
 **Purpose**: Track how narratives change over time.
 
 **What you can do**:
@@ -128,23 +118,19 @@ st.markdown("""
 2. Choose specific themes or meso narratives to track
 3. Use the date range selector to zoom into periods of interest
 4. Examine line charts showing narrative frequency over time
-""")
+"""
 
 # ═══════════════════════════════════════════════════════════════════════════
-# Section 3: Annotation Instructions
+# Section 3: Annotation Instructions (+ Section 4: Additional Resources)
 # ═══════════════════════════════════════════════════════════════════════════
-st.header("3. Annotation Instructions for Taxonomy Quality Control", anchor="annotation-guide")
-
-st.markdown("""
+ANNOTATION_INTRO_MD = """
 The **Narratives Taxonomy** page allows you to review and rate the quality of meso narratives identified by our AI system. 
 Your annotations help improve the taxonomy by identifying issues with how narratives have been extracted or categorized.
-""")
+"""
 
-st.info("**💡 Before you start**: Sign in using the main page to save your annotations. Unsigned users can browse but cannot save ratings.")
-
-st.subheader("🏷️ What Each Label Means")
+ANNOTATION_GUIDE_MD = """
+### 🏷️ What Each Label Means
 
-st.markdown("""
 When reviewing each meso narrative, you'll choose from the following quality labels:
 
 ---
@@ -228,11 +214,9 @@ When reviewing each meso narrative, you'll choose from the following quality lab
 **Note**: Blank annotations are not saved to the database.
 
 ---
-""")
 
-st.subheader("📋 Annotation Workflow")
+### 📋 Annotation Workflow
 
-st.markdown("""
 **Step-by-step process**:
 
 1. **Sign in** via the main page (required to save annotations)
@@ -284,14 +268,9 @@ Pay special attention to NEW narratives — your annotations are especially valu
 ### ❓ Questions or Issues?
 
 If you encounter narratives that don't fit any category, or if you notice systemic issues with the taxonomy, please contact the research team.
-""")
 
-# ═══════════════════════════════════════════════════════════════════════════
-# Additional Resources
-# ═══════════════════════════════════════════════════════════════════════════
-st.header("4. Additional Resources")
+## 4. Additional Resources
 
-st.markdown("""
 ### 🔗 Quick Links
 - **Narratives Taxonomy**: Review and annotate narrative quality
 - **Narratives on Articles**: Explore individual articles and their extracted narratives
@@ -310,8 +289,19 @@ The taxonomy is versioned and periodically updated based on:
 - Merging of duplicate narratives
 
 Always check which revision you're working with on the Taxonomy page.
-""")
+"""
+
+st.title("📖 MigNar Platform Instructions")
+
+st.markdown(OVERVIEW_MD)
+
+st.header("3. Annotation Instructions for Taxonomy Quality Control", anchor="annotation-guide")
+st.markdown(ANNOTATION_INTRO_MD)
+
+st.info("**💡 Before you start**: Sign in using the main page to save your annotations. Unsigned users can browse but cannot save ratings.")
+
+st.markdown(ANNOTATION_GUIDE_MD)
 
 st.divider()
 
-st.caption("MigNar Platform — Migration Narratives Analysis Tool")
\ No newline at end of file
+st.caption("MigNar Platform — Migration Narratives Analysis Tool")
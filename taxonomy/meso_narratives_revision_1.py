@@ -1,10 +1,4 @@
 mesoNarratives = {
-    # "vulnerability of migrants": [
-    #     "We should provide shelter and legal aid for refugees fleeing war",
-    #     "We should ensure safe passage for migrants escaping persecution",
-    #     "Migrants exploit vulnerabilities to enter illegally",
-    #     "Migrant vulnerability claims are exaggerated to gain benefits"
-    # ],
     "international law about migrants": [
         "Countries must uphold UN conventions on refugee rights",
         "International treaties protect asylum seekers from refoulement",
@@ -91,18 +85,6 @@ mesoNarratives = {
         "Migrants are willing to work for lower pay and conditions",
         "Migrants are victims of labour exploitation",
     ],
-    # "migration and population growth": [
-    #     "Migration offsets declining birth rates",
-    #     "Migrants keep communities alive in rural areas",
-    #     "Migration causes unsustainable population growth",
-    #     "Rapid population growth from migration strains resources"
-    # ],
-    # "net migration": [
-    #     "Positive net migration boosts economic growth",
-    #     "Stable net migration balances workforce needs",
-    #     "High net migration overwhelms infrastructure",
-    #     "Net migration targets are consistently missed"
-    # ],
     "demographic aspects of migration": [
         "Migration brings youthful energy to an ageing society",
         "Migration changes the ethnic balance of cities",
@@ -129,14 +111,6 @@ mesoNarratives = {
         "Colonial obligation is outdated and irrelevant today",
         "Colonial ties are exploited to bypass immigration controls",
     ],
-    # "allocation of resources to migrants": [
-    #     "Resource allocation to migrants is an investment in society",
-    #     "Helping migrants strengthens the community overall",
-    #     "Aid to migrants diverts resources from local needy citizens",
-    #     "Migrants burden the healthcare system",
-    #     "Migration strains affordable housing supply",
-    #     "Migrants contribute to the economy, so they merit resources"
-    # ],
     "political rhetoric around migrants": [
         "Politicians unfairly blame migrants for societal problems",
         "Scapegoating migrants distracts from policy failures",
@@ -328,36 +302,12 @@ mesoNarratives = {
         "Migrants increase theft and property crimes",
         "Migration brings organized theft rings",
     ],
-    # "migrants as sexual predators": [
-    #     "Sexual assault is not more common among migrants",
-    #     "Migrants help raise awareness of sexual violence prevention",
-    #     "Migrants are responsible for rising sexual assault cases",
-    #     "Migration brings dangerous sexual offenders"
-    # ],
-    # "migrants as child abusers": [
-    #     "Child abuse rates are not higher among migrants",
-    #     "Migrants support child protection efforts",
-    #     "Migrants are involved in child abuse scandals",
-    #     "Migration exposes children to greater risks"
-    # ],
-    # "migrants as thieves": [
-    #     "Migrants are no more likely to steal than locals",
-    #     "Migrants contribute to honest local economies",
-    #     "Migrants increase theft and property crimes",
-    #     "Migration brings organized theft rings"
-    # ],
     "migrants and terrorism": [
         "Most migrants reject extremist violence",
         "Migrants help counter radicalization",
         "Migrants bring extremist ideologies",
         "Migration increases terrorism risks"
     ],
-    # "migrants as smugglers": [
-    #     "Some migrants combat smuggling by reporting networks",
-    #     "Migrants aid authorities against smuggling rings",
-    #     "Migrants are involved in smuggling operations",
-    #     "Migration increases human smuggling activity"
-    # ],
     "family rights of migrants": [
         "Family reunification strengthens migrant integration",
         "Protecting family rights is a humanitarian duty",
@@ -391,12 +341,6 @@ mesoNarratives = {
         "LGBT claims are fabricated for asylum benefits",
         "LGBT migrants refuse to integrate into traditional societies"
     ],
-    # "economic integration of migrants": [
-    #     "Economic integration boosts productivity",
-    #     "Migrants integrate into the workforce and pay taxes",
-    #     "Migrants resist economic integration",
-    #     "Economic integration benefits migrants at locals' expense"
-    # ],
     "social integration": [
         "Social integration builds community cohesion",
         "Migrants actively participate in civic life",
@@ -440,9 +384,7 @@ mesoNarratives = {
     "detention and deportation of migrants": [
         "Current detention practices violate human rights",
         "Current detention practices are legitimate and necessary",
-        # "Alternatives to detention reduce costs and protect dignity",
         "Current detention capacity requires expansion to manage flows",
-        # "Deportation processes must respect due process and safety",
         "Expedited deportations are risking wrongful removal",
         "Targeted deportations deter repeat irregular entry",
         "Deportations separate families and harm children",
@@ -450,59 +392,11 @@ mesoNarratives = {
         "Detention centers expose migrants to abuse and neglect",
         "Detention of migrants' children is acceptable",
         "Detention of migrants' children is unacceptable",
-        # "Overreliance on detention undermines community trust",
-        # "Transparent deportation practices build public confidence"
-    ],
-    # "remittances and diaspora impacts": [
-    #     "Remittances sustain families and drive development in origin countries",
-    #     "Diaspora networks stimulate bilateral trade and investment",
-    #     "High-skilled emigration creates brain drain pressures",
-    #     "Circular migration encourages skill transfer back home",
-    #     "Remittance dependence can delay structural reforms",
-    #     "Diaspora engagement strengthens soft power ties",
-    #     "Talent circulation balances brain drain with innovation gains",
-    #     "Financial flows from migrants stabilize fragile economies"
-    # ],
-    # "temporary and seasonal migrant labour": [
-    #     "Seasonal migrant labour fills critical agricultural gaps",
-    #     "Well-regulated temporary visas prevent exploitation",
-    #     "Temporary worker programs can depress local wages",
-    #     "Return migration preserves long-term community ties",
-    #     "Poor oversight of seasonal schemes enables abuse",
-    #     "Flexible visa pathways support economic resilience",
-    #     "Employer dependence on seasonal labour delays automation investment",
-    #     "Transparent recruitment reduces trafficking risks"
-    # ],
+    ],
     "media coverage on migration": [
         "Mainstream media censors negative news about migrants",
         "Media exaggerates negative news about migrants",
         "Media has a pro-immigrant bias in coverage",
         "Media has an anti-immigrant bias in coverage",
-        # "Constructive narratives improve integration outcomes",
-        # "Disinformation about migrants spreads rapidly online",
-        # "Data-driven reporting builds informed policy debate",
-        # "Selective framing distorts migration’s real impacts",
-        # "Positive storytelling highlights migrant contributions",
-        # "Media literacy reduces polarization around migration issues"
-    ],
-    # "search and rescue and dangerous journeys": [
-    #     "Search and rescue operations save lives at sea",
-    #     "Safe pathways reduce reliance on smugglers",
-    #     "Rescue efforts risk unintentionally incentivizing dangerous crossings",
-    #     "Coordinated maritime response prevents mass casualty events",
-    #     "Criminal networks exploit lack of legal routes",
-    #     "Humanitarian corridors uphold moral and legal duties",
-    #     "Deterrence without protections increases journey risks",
-    #     "Information campaigns can reduce perilous departures"
-    # ],
-    # "regional and local capacity for migration": [
-    #     "Planned migrant settlement revitalizes declining regions",
-    #     "Local services need support to absorb sudden arrivals",
-    #     "Uneven geographic distribution strains specific municipalities",
-    #     "Targeted funding helps communities adapt effectively",
-    #     "Rapid inflows challenge housing and infrastructure planning",
-    #     "Collaborative local governance improves integration outcomes",
-    #     "Capacity assessments guide sustainable migration policy",
-    #     "Underpopulated areas benefit from migrant workforce inflows"
-    # ]
-}
\ No newline at end of file
+    ],
+}
@@ -0,0 +1,122 @@
+# Themes and narratives retired from revision 1. They used to sit commented out
+# in meso_narratives_revision_1.py; they are kept here as data for reference and
+# are not loaded by the dashboards (list_revisions only matches
+# meso_narratives_revision_<n>.py).
+
+# Whole themes no longer in revision 1
+inactiveMesoNarratives = {
+    "vulnerability of migrants": [
+        "We should provide shelter and legal aid for refugees fleeing war",
+        "We should ensure safe passage for migrants escaping persecution",
+        "Migrants exploit vulnerabilities to enter illegally",
+        "Migrant vulnerability claims are exaggerated to gain benefits"
+    ],
+    "migration and population growth": [
+        "Migration offsets declining birth rates",
+        "Migrants keep communities alive in rural areas",
+        "Migration causes unsustainable population growth",
+        "Rapid population growth from migration strains resources"
+    ],
+    "net migration": [
+        "Positive net migration boosts economic growth",
+        "Stable net migration balances workforce needs",
+        "High net migration overwhelms infrastructure",
+        "Net migration targets are consistently missed"
+    ],
+    "allocation of resources to migrants": [
+        "Resource allocation to migrants is an investment in society",
+        "Helping migrants strengthens the community overall",
+        "Aid to migrants diverts resources from local needy citizens",
+        "Migrants burden the healthcare system",
+        "Migration strains affordable housing supply",
+        "Migrants contribute to the economy, so they merit resources"
+    ],
+    "migrants as sexual predators": [
+        "Sexual assault is not more common among migrants",
+        "Migrants help raise awareness of sexual violence prevention",
+        "Migrants are responsible for rising sexual assault cases",
+        "Migration brings dangerous sexual offenders"
+    ],
+    "migrants as child abusers": [
+        "Child abuse rates are not higher among migrants",
+        "Migrants support child protection efforts",
+        "Migrants are involved in child abuse scandals",
+        "Migration exposes children to greater risks"
+    ],
+    "migrants as thieves": [
+        "Migrants are no more likely to steal than locals",
+        "Migrants contribute to honest local economies",
+        "Migrants increase theft and property crimes",
+        "Migration brings organized theft rings"
+    ],
+    "migrants as smugglers": [
+        "Some migrants combat smuggling by reporting networks",
+        "Migrants aid authorities against smuggling rings",
+        "Migrants are involved in smuggling operations",
+        "Migration increases human smuggling activity"
+    ],
+    "economic integration of migrants": [
+        "Economic integration boosts productivity",
+        "Migrants integrate into the workforce and pay taxes",
+        "Migrants resist economic integration",
+        "Economic integration benefits migrants at locals' expense"
+    ],
+    "remittances and diaspora impacts": [
+        "Remittances sustain families and drive development in origin countries",
+        "Diaspora networks stimulate bilateral trade and investment",
+        "High-skilled emigration creates brain drain pressures",
+        "Circular migration encourages skill transfer back home",
+        "Remittance dependence can delay structural reforms",
+        "Diaspora engagement strengthens soft power ties",
+        "Talent circulation balances brain drain with innovation gains",
+        "Financial flows from migrants stabilize fragile economies"
+    ],
+    "temporary and seasonal migrant labour": [
+        "Seasonal migrant labour fills critical agricultural gaps",
+        "Well-regulated temporary visas prevent exploitation",
+        "Temporary worker programs can depress local wages",
+        "Return migration preserves long-term community ties",
+        "Poor oversight of seasonal schemes enables abuse",
+        "Flexible visa pathways support economic resilience",
+        "Employer dependence on seasonal labour delays automation investment",
+        "Transparent recruitment reduces trafficking risks"
+    ],
+    "search and rescue and dangerous journeys": [
+        "Search and rescue operations save lives at sea",
+        "Safe pathways reduce reliance on smugglers",
+        "Rescue efforts risk unintentionally incentivizing dangerous crossings",
+        "Coordinated maritime response prevents mass casualty events",
+        "Criminal networks exploit lack of legal routes",
+        "Humanitarian corridors uphold moral and legal duties",
+        "Deterrence without protections increases journey risks",
+        "Information campaigns can reduce perilous departures"
+    ],
+    "regional and local capacity for migration": [
+        "Planned migrant settlement revitalizes declining regions",
+        "Local services need support to absorb sudden arrivals",
+        "Uneven geographic distribution strains specific municipalities",
+        "Targeted funding helps communities adapt effectively",
+        "Rapid inflows challenge housing and infrastructure planning",
+        "Collaborative local governance improves integration outcomes",
+        "Capacity assessments guide sustainable migration policy",
+        "Underpopulated areas benefit from migrant workforce inflows"
+    ]
+}
+
+# Narratives dropped from themes that are still active in revision 1
+inactiveThemeNarratives = {
+    "detention and deportation of migrants": [
+        "Alternatives to detention reduce costs and protect dignity",
+        "Deportation processes must respect due process and safety",
+        "Overreliance on detention undermines community trust",
+        "Transparent deportation practices build public confidence"
+    ],
+    "media coverage on migration": [
+        "Constructive narratives improve integration outcomes",
+        "Disinformation about migrants spreads rapidly online",
+        "Data-driven reporting builds informed policy debate",
+        "Selective framing distorts migration’s real impacts",
+        "Positive storytelling highlights migrant contributions",
+        "Media literacy reduces polarization around migration issues"
+    ]
+}